@@ -0,0 +1,97 @@
+"""
+Вимірювання: замкнений цикл із N конкурентних клієнтів, перцентилі латентності,
+порівняння з базовими результатами.
+"""
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+# один запит сценарію: (клієнт, порядковий номер запиту) -> відповідь
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Перцентиль методом найближчого рангу (значення відсортовані за зростанням).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+async def measure(client: httpx.AsyncClient, request: Request, total: int, concurrency: int,
+                  warmup: int = 0) -> dict:
+    """
+    Виконати total запитів concurrency паралельними клієнтами; warmup перших не враховуються.
+    """
+    for i in range(warmup):
+        await request(client, i)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(warmup, warmup + total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await request(client, i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, total)))))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float,
+            noise_ms: float = 1.0) -> List[Tuple[str, str]]:
+    """
+    Список регресій (ключ, опис): p95 виріс більше ніж на threshold (і більше ніж на noise_ms)
+    або пропускна здатність упала більше ніж на threshold. Ключі без базового значення пропускаються.
+    """
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + threshold) and current["p95_ms"] - base["p95_ms"] > noise_ms:
+            regressions.append((key, f"p95 {base['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms"))
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append((key, f"rps {base['rps']:.1f} -> {current['rps']:.1f}"))
+    return regressions
+
+
+def format_table(results: Dict[str, dict], baseline: Dict[str, dict]) -> str:
+    header = f"{'scenario':<40} {'req':>6} {'err':>4} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'Δp95':>8}"
+    lines = [header, "-" * len(header)]
+    for key, r in results.items():
+        base = baseline.get(key)
+        delta = f"{(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%" if base and base["p95_ms"] else ""
+        lines.append(
+            f"{key:<40} {r['requests']:>6} {r['errors']:>4} {r['rps']:>9.1f} "
+            f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {delta:>8}"
+        )
+    return "\n".join(lines)
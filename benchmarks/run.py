@@ -0,0 +1,211 @@
+"""
+HTTP-бенчмарки API.
+
+    python -m benchmarks.run                         # in-process (httpx.ASGITransport)
+    python -m benchmarks.run --target uvicorn        # окремий процес uvicorn
+    python -m benchmarks.run --sizes 0,1000,10000 --requests 500 --concurrency 20
+    python -m benchmarks.run --save-baseline         # перезаписати базові результати поточними
+
+Потрібні ті самі DATABASE_URL / REDIS_URL, що й для застосунку, і створені таблиці
+(python -m contacts_api.create_tables або --create-tables). Для великих наборів даних
+зручніше заздалегідь наповнити БД (python -m contacts_api.generate_dataset), а тут брати
+невеликі розміри.
+
+Для кожного сценарію виводяться p50/p95/p99 і запити за секунду. Результати порівнюються
+з базовими (--baseline): p95 гірший або пропускна здатність нижча більше ніж на --threshold
+(BENCH_THRESHOLD, за замовчуванням 0.25) — код виходу 1.
+
+Абсолютні числа залежать від машини, тому базовий файл не комітиться: перший запуск на
+машині (і перший запуск нового сценарію чи розміру) записує свої результати як базові,
+наступні порівнюються з ними.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+# ліміти частоти вимірювали б самі себе
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("SQL_PROFILER_ENABLED", "false")
+
+import httpx  # noqa: E402
+
+from benchmarks.harness import compare, format_table, measure  # noqa: E402
+from benchmarks.scenarios import SCENARIOS, seed  # noqa: E402
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+@asynccontextmanager
+async def asgi_client():
+    from contacts_api.app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int = 1):
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "contacts_api.app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    await client.get("/openapi.json")
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError("uvicorn did not start in 30 s")
+                    await asyncio.sleep(0.2)
+            yield client
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_target(target: str, args) -> dict:
+    rng = random.Random(args.seed)
+    selected = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+    client_factory = asgi_client() if target == "asgi" else uvicorn_client(args.workers)
+    results = {}
+
+    async with client_factory as client:
+        unsized = [s for s in selected if not s.sized]
+        sized = [s for s in selected if s.sized]
+        if unsized:
+            ctx = await seed(client, 0, rng)
+            for scenario in unsized:
+                results[f"{target}:{scenario.name}"] = await measure(
+                    client, scenario.build(ctx, rng), args.auth_requests, args.concurrency, args.warmup
+                )
+                print(f"  {target}:{scenario.name} done", file=sys.stderr)
+        for size in args.sizes if sized else []:
+            ctx = await seed(client, size, rng)
+            for scenario in sized:
+                request = scenario.build(ctx, rng)
+                if request is None:
+                    continue
+                results[f"{target}:{scenario.name}@{size}"] = await measure(
+                    client, request, args.requests, args.concurrency, args.warmup
+                )
+                print(f"  {target}:{scenario.name}@{size} done", file=sys.stderr)
+    return results
+
+
+def load_baseline(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get("results", {})
+
+
+def save_baseline(path: Path, results: dict, args):
+    merged = {**load_baseline(path), **results}
+    payload = {
+        "meta": {
+            "updated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "requests": args.requests,
+            "auth_requests": args.auth_requests,
+            "concurrency": args.concurrency,
+        },
+        "results": dict(sorted(merged.items())),
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["asgi", "uvicorn", "both"], default="asgi")
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in v.split(",")], default=[0, 100, 1000],
+                        help="кількість контактів у користувача для сценаріїв читання/запису")
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=None,
+                        help=f"підмножина з: {', '.join(s.name for s in SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="запитів на сценарій")
+    parser.add_argument("--auth-requests", type=int, default=20, help="запитів на signup/login (bcrypt)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="воркери uvicorn")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", "0.25")),
+                        help="допустиме погіршення відносно базових результатів (0.25 = 25%%)")
+    parser.add_argument("--noise-ms", type=float, default=1.0,
+                        help="зміни p95, менші за це значення, не вважаються регресією")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="записати результати цього запуску в JSON")
+    parser.add_argument("--create-tables", action="store_true")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.create_tables:
+        from contacts_api.create_tables import create_tables
+
+        await create_tables()
+
+    results = {}
+    for target in (["asgi", "uvicorn"] if args.target == "both" else [args.target]):
+        results.update(await run_target(target, args))
+
+    baseline = load_baseline(args.baseline)
+    print(format_table(results, baseline))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    failed = [key for key, r in results.items() if r["errors"]]
+    for key in failed:
+        print(f"ERRORS: {key}: {results[key]['errors']} failed requests", file=sys.stderr)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, args)
+        print(f"baseline saved to {args.baseline}")
+        return 1 if failed else 0
+
+    regressions = compare(results, baseline, args.threshold, args.noise_ms)
+    for key, description in regressions:
+        print(f"REGRESSION: {key}: {description}", file=sys.stderr)
+
+    # результати з помилками базовими не стають
+    new = {key: r for key, r in results.items() if key not in baseline and not r["errors"]}
+    if new:
+        save_baseline(args.baseline, new, args)
+        print(f"no baseline for {', '.join(new)}; recorded in {args.baseline}")
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,147 @@
+"""
+Сценарії навантаження. Дані готуються через сам API (signup + POST /api/contacts/batch),
+тож сценарії однаково працюють і in-process, і проти uvicorn.
+"""
+import random
+import uuid
+from datetime import date, timedelta
+from typing import Callable, List, NamedTuple, Optional
+
+import httpx
+
+from benchmarks.harness import Request
+from contacts_api.app.pagination import NEXT_CURSOR_HEADER
+
+PASSWORD = "bench-password"
+PAGE_SIZE = 50
+FIRST_NAMES = ["Olena", "Ivan", "Maria", "Andrii", "Sofia", "Taras", "Anna", "Petro", "Iryna", "Oleh"]
+LAST_NAMES = ["Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko", "Melnyk", "Boyko", "Moroz"]
+SEARCH_TERM = "kovalenko"
+BATCH_SIZE = 500
+
+
+class Context(NamedTuple):
+    email: str
+    headers: dict
+    contact_ids: List[int]
+
+
+class Scenario(NamedTuple):
+    name: str
+    # False — сценарій не залежить від розміру набору даних і виконується один раз
+    sized: bool
+    build: Callable[["Context", random.Random], Optional[Request]]
+
+
+def fake_contact(rng: random.Random) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "first_name": first,
+        "last_name": last,
+        "email": f"{first}.{last}.{uuid.uuid4().hex[:12]}@example.com".lower(),
+        "phone": f"+380{rng.randrange(10**8, 10**9)}",
+        "birthday": (date(1960, 1, 1) + timedelta(days=rng.randrange(365 * 45))).isoformat(),
+        "additional_info": None,
+    }
+
+
+async def create_user(client: httpx.AsyncClient) -> Context:
+    email = f"bench-{uuid.uuid4().hex}@example.com"
+    res = await client.post("/api/auth/signup", json={"email": email, "password": PASSWORD})
+    res.raise_for_status()
+    res = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    res.raise_for_status()
+    return Context(email, {"Authorization": f"Bearer {res.json()['access_token']}"}, [])
+
+
+async def seed(client: httpx.AsyncClient, size: int, rng: random.Random) -> Context:
+    """
+    Новий користувач із size контактами.
+    """
+    ctx = await create_user(client)
+    for offset in range(0, size, BATCH_SIZE):
+        operations = [
+            {"op": "create", "data": fake_contact(rng)} for _ in range(min(BATCH_SIZE, size - offset))
+        ]
+        res = await client.post("/api/contacts/batch", json={"operations": operations}, headers=ctx.headers)
+        res.raise_for_status()
+        ctx.contact_ids.extend(r["id"] for r in res.json()["results"])
+    return ctx
+
+
+def signup(ctx: Context, rng: random.Random) -> Request:
+    def request(client, i):
+        email = f"bench-signup-{uuid.uuid4().hex}@example.com"
+        return client.post("/api/auth/signup", json={"email": email, "password": PASSWORD})
+    return request
+
+
+def login(ctx: Context, rng: random.Random) -> Request:
+    def request(client, i):
+        return client.post("/api/auth/login", json={"email": ctx.email, "password": PASSWORD})
+    return request
+
+
+def list_contacts(ctx: Context, rng: random.Random) -> Request:
+    def request(client, i):
+        params = {"skip": (i % 10) * PAGE_SIZE, "limit": PAGE_SIZE}
+        return client.get("/api/contacts", params=params, headers=ctx.headers)
+    return request
+
+
+def cursor_walk(ctx: Context, rng: random.Random) -> Request:
+    """
+    Прохід усім списком за X-Next-Cursor (keyset): кожен запит бере курсор з попередньої
+    відповіді, після останньої сторінки прохід починається знову.
+    """
+    cursor = [None]
+
+    async def request(client, i):
+        params = {"limit": PAGE_SIZE}
+        if cursor[0]:
+            params["cursor"] = cursor[0]
+        response = await client.get("/api/contacts", params=params, headers=ctx.headers)
+        cursor[0] = response.headers.get(NEXT_CURSOR_HEADER) or None
+        return response
+    return request
+
+
+def get_contact(ctx: Context, rng: random.Random) -> Optional[Request]:
+    if not ctx.contact_ids:
+        return None
+
+    def request(client, i):
+        return client.get(f"/api/contacts/{rng.choice(ctx.contact_ids)}", headers=ctx.headers)
+    return request
+
+
+def search(ctx: Context, rng: random.Random) -> Request:
+    def request(client, i):
+        return client.get("/api/contacts/search/", params={"query": SEARCH_TERM, "limit": 50}, headers=ctx.headers)
+    return request
+
+
+def birthdays(ctx: Context, rng: random.Random) -> Request:
+    def request(client, i):
+        return client.get("/api/contacts/birthdays", params={"days": 30}, headers=ctx.headers)
+    return request
+
+
+def batch_create(ctx: Context, rng: random.Random) -> Request:
+    def request(client, i):
+        operations = [{"op": "create", "data": fake_contact(rng)} for _ in range(50)]
+        return client.post("/api/contacts/batch", json={"operations": operations}, headers=ctx.headers)
+    return request
+
+
+# порядок важливий: записи йдуть останніми, щоб не змінювати набір даних під читаннями
+SCENARIOS = [
+    Scenario("signup", False, signup),
+    Scenario("login", False, login),
+    Scenario("list", True, list_contacts),
+    Scenario("cursor_walk", True, cursor_walk),
+    Scenario("get", True, get_contact),
+    Scenario("search", True, search),
+    Scenario("birthdays", True, birthdays),
+    Scenario("batch_create", True, batch_create),
+]
@@ -1,9 +1,7 @@
-from passlib.context import CryptContext
-
-# Контекст хешування паролів
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from contacts_api.app.hashing import pwd_context
 
 
+# Синхронні варіанти; в async-обробниках використовуйте hashing.hashing_pool
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
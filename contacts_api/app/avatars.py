@@ -0,0 +1,251 @@
+"""
+Потокове завантаження аватарів.
+
+multipart-тіло розбирається по шматках у міру надходження: частина "file" пишеться
+у SpooledTemporaryFile (на диск, щойно перевищить AVATAR_SPOOL_BYTES), розмір
+перевіряється на кожному шматку (413), тип — за сигнатурою перших байтів (415), а
+sha256 рахується дорогою і стає ключем у сховищі (storage.py). Перед збереженням
+зображення перевіряється Pillow: файл із правильною сигнатурою, що не декодується, — теж 415.
+Вивантаження в сховище виконується в потоці, а не в event loop; з ?background=true
+воно йде після відповіді, а стан задачі зберігається в Redis.
+"""
+import asyncio
+import hashlib
+import logging
+import tempfile
+import uuid
+from typing import IO, NamedTuple, Optional
+
+from fastapi import HTTPException, Request, status
+from PIL import Image
+from python_multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from contacts_api.app.cache import get_redis, write_through_user
+from contacts_api.app.database import get_sessionmaker
+from contacts_api.app.models import User
+from contacts_api.app.settings import get_settings
+from contacts_api.app.storage import store_blob
+
+settings = get_settings()
+
+AVATAR_MAX_BYTES = settings.avatar_max_bytes
+AVATAR_SPOOL_BYTES = 256 * 1024
+AVATAR_JOB_TTL = settings.avatar_job_ttl
+# запас на заголовки multipart понад сам файл
+MULTIPART_OVERHEAD = 16 * 1024
+
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+SNIFF_BYTES = 12
+
+logger = logging.getLogger(__name__)
+
+
+class ReceivedAvatar(NamedTuple):
+    file: IO[bytes]
+    sha256: str
+    content_type: str
+    size: int
+
+    def close(self):
+        self.file.close()
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class _AvatarReceiver:
+    """
+    Колбеки MultipartParser: складають частину "file" у spool, решту ігнорують.
+    """
+
+    def __init__(self, spool: IO[bytes]):
+        self.spool = spool
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.head = b""
+        self.content_type = None
+        self.found = False
+        self._in_file = False
+        self._headers = {}
+        self._field = b""
+        self._value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._in_file = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field, self._value = b"", b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._in_file = options.get(b"name") == b"file" and not self.found
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_file:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > AVATAR_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Avatar larger than {AVATAR_MAX_BYTES} bytes",
+            )
+        if self.content_type is None:
+            self.head += chunk[:SNIFF_BYTES]
+            if len(self.head) >= SNIFF_BYTES:
+                self._check_type()
+        self.digest.update(chunk)
+        self.spool.write(chunk)
+
+    def on_part_end(self):
+        if self._in_file:
+            if self.content_type is None:
+                self._check_type()
+            self.found = True
+            self._in_file = False
+
+    def _check_type(self):
+        self.content_type = sniff_image_type(self.head)
+        if self.content_type is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Avatar must be a JPEG, PNG, GIF or WebP image",
+            )
+
+
+def _check_decodable(file: IO[bytes]):
+    try:
+        with Image.open(file) as image:
+            image.verify()
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Avatar is not a valid image",
+        )
+    finally:
+        file.seek(0)
+
+
+async def receive_avatar(request: Request) -> ReceivedAvatar:
+    """
+    Прочитати поле "file" з multipart-тіла в тимчасовий файл, не тримаючи все тіло в пам'яті.
+    Файл у результаті перемотаний на початок; закрити його має той, хто викликав.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=422,
+            detail="Expected multipart/form-data with a 'file' field",
+        )
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > AVATAR_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Avatar larger than {AVATAR_MAX_BYTES} bytes",
+        )
+
+    spool = tempfile.SpooledTemporaryFile(max_size=AVATAR_SPOOL_BYTES)
+    try:
+        receiver = _AvatarReceiver(spool)
+        parser = MultipartParser(boundary, receiver.callbacks())
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+        if not receiver.found:
+            raise HTTPException(
+                status_code=422,
+                detail="Field 'file' is required",
+            )
+        spool.seek(0)
+        # декодування — робота CPU, не для event loop
+        await asyncio.to_thread(_check_decodable, spool)
+    except BaseException:
+        spool.close()
+        raise
+    return ReceivedAvatar(spool, receiver.digest.hexdigest(), receiver.content_type, receiver.size)
+
+
+async def store_avatar(upload: ReceivedAvatar, user_id: int, db: AsyncSession) -> User:
+    url = await store_blob(upload.sha256, upload.file, upload.content_type)
+
+    user = await db.get(User, user_id)
+    if user.avatar_url != url:
+        user.avatar_url = url
+        await db.commit()
+        await write_through_user(user)
+    return user
+
+
+def _job_key(job_id: str) -> str:
+    return f"{settings.env}:avatar-job:{job_id}"
+
+
+async def create_job(user_id: int) -> str:
+    job_id = uuid.uuid4().hex
+    key = _job_key(job_id)
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={"status": "pending", "user_id": user_id})
+        pipe.expire(key, AVATAR_JOB_TTL)
+        await pipe.execute()
+    return job_id
+
+
+async def get_job(job_id: str, user_id: int) -> dict:
+    job = await get_redis().hgetall(_job_key(job_id))
+    if not job or job.get("user_id") != str(user_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "avatar_url": job.get("avatar_url"),
+        "error": job.get("error"),
+    }
+
+
+async def run_job(job_id: str, upload: ReceivedAvatar, user_id: int):
+    """
+    Фонова задача: власна сесія БД, бо сесія запиту (get_db) до цього часу вже може бути закрита.
+    """
+    key = _job_key(job_id)
+    try:
+        await get_redis().hset(key, "status", "uploading")
+        async with get_sessionmaker()() as db:
+            user = await store_avatar(upload, user_id, db)
+        await get_redis().hset(key, mapping={"status": "done", "avatar_url": user.avatar_url or ""})
+    except Exception as e:
+        logger.exception("avatar job %s failed", job_id)
+        await get_redis().hset(key, mapping={"status": "failed", "error": str(e)[:500]})
+    finally:
+        upload.close()
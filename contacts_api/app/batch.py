@@ -0,0 +1,126 @@
+"""
+Пакет змішаних операцій над контактами в одній транзакції.
+
+Кожна операція перевіряється окремо: невалідні отримують свій статус (422/409),
+решта виконуються групами — один багаторядковий INSERT ... RETURNING для створень,
+SELECT + bulk UPDATE за первинним ключем для оновлень і один DELETE ... RETURNING
+для видалень — та одним commit. Порядок груп фіксований, тому один контакт може
+фігурувати в пакеті лише раз (повтор — 409).
+"""
+from typing import List
+
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from contacts_api.app.cache import bump_contacts_generation
+from contacts_api.app.models import Contact, User, birthday_key
+from contacts_api.app.schemas import BatchOperation, ContactCreate, ContactUpdate
+
+
+def _result(index: int, op: str, status: int, **fields) -> dict:
+    return {"index": index, "op": op, "status": status, **fields}
+
+
+def _validation_errors(e: ValidationError) -> list:
+    return e.errors(include_url=False, include_context=False, include_input=False)
+
+
+async def apply_batch(operations: List[BatchOperation], db: AsyncSession, user: User) -> List[dict]:
+    results = [None] * len(operations)
+    creates, updates, deletes = [], {}, {}
+    seen = set()
+
+    for index, operation in enumerate(operations):
+        if operation.op == "create":
+            try:
+                creates.append((index, ContactCreate.model_validate(operation.data or {})))
+            except ValidationError as e:
+                results[index] = _result(index, "create", 422, errors=_validation_errors(e))
+            continue
+
+        if operation.id is None:
+            results[index] = _result(index, operation.op, 422, errors=[{"msg": "id is required"}])
+            continue
+        if operation.id in seen:
+            results[index] = _result(
+                index, operation.op, 409, id=operation.id,
+                errors=[{"msg": "Contact appears more than once in the batch"}],
+            )
+            continue
+        seen.add(operation.id)
+
+        if operation.op == "update":
+            try:
+                values = ContactUpdate.model_validate(operation.data or {}).model_dump(exclude_unset=True)
+            except ValidationError as e:
+                results[index] = _result(index, "update", 422, id=operation.id, errors=_validation_errors(e))
+                continue
+            if "birthday" in values:
+                values["birthday_key"] = birthday_key(values["birthday"])
+            updates[operation.id] = (index, values)
+        else:
+            deletes[operation.id] = index
+
+    changed = False
+
+    if creates:
+        rows = [
+            {**data.model_dump(), "birthday_key": birthday_key(data.birthday), "user_id": user.id}
+            for _, data in creates
+        ]
+        created = (
+            await db.execute(insert(Contact).returning(Contact, sort_by_parameter_order=True), rows)
+        ).scalars().all()
+        for (index, _), contact in zip(creates, created):
+            results[index] = _result(index, "create", 201, id=contact.id, contact=contact)
+        changed = True
+
+    if updates:
+        owned = {
+            contact.id: contact
+            for contact in (
+                await db.execute(
+                    select(Contact).where(Contact.user_id == user.id, Contact.id.in_(updates))
+                )
+            ).scalars()
+        }
+        params = []
+        for contact_id, (index, values) in updates.items():
+            contact = owned.get(contact_id)
+            if contact is None:
+                results[index] = _result(index, "update", 404, id=contact_id, errors=[{"msg": "Contact not found"}])
+                continue
+            if values:
+                params.append({"id": contact_id, **values})
+                # bulk UPDATE не оновлює об'єкти в identity map, тому переносимо значення самі
+                for key, value in values.items():
+                    set_committed_value(contact, key, value)
+            results[index] = _result(index, "update", 200, id=contact_id, contact=contact)
+        if params:
+            await db.execute(update(Contact), params)
+            changed = True
+
+    if deletes:
+        removed = set(
+            (
+                await db.execute(
+                    delete(Contact)
+                    .where(Contact.user_id == user.id, Contact.id.in_(deletes))
+                    .returning(Contact.id)
+                    .execution_options(synchronize_session=False)
+                )
+            ).scalars()
+        )
+        for contact_id, index in deletes.items():
+            if contact_id in removed:
+                results[index] = _result(index, "delete", 204, id=contact_id)
+            else:
+                results[index] = _result(index, "delete", 404, id=contact_id, errors=[{"msg": "Contact not found"}])
+        changed = changed or bool(removed)
+
+    await db.commit()
+    if changed:
+        await bump_contacts_generation(user.id)
+    return results
@@ -0,0 +1,65 @@
+"""
+Потоковий експорт контактів користувача в NDJSON або CSV.
+
+Рядки читаються серверним курсором (db.stream + yield_per) і віддаються
+шматками по EXPORT_CHUNK_SIZE, без ORM-об'єктів і без Pydantic-валідації,
+тому пам'ять і час до першого байта не залежать від кількості контактів.
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from contacts_api.app.models import Contact, User
+from contacts_api.app.settings import get_settings
+
+EXPORT_CHUNK_SIZE = get_settings().export_chunk_size
+
+EXPORT_COLUMNS = ("id", "first_name", "last_name", "email", "phone", "birthday", "additional_info")
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_json_default) + "\n" for row in rows
+    ).encode()
+
+
+def _encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_contacts(db: AsyncSession, user: User, fmt: str = "ndjson") -> AsyncIterator[bytes]:
+    """
+    Віддавати контакти користувача (за зростанням id) шматками байтів у форматі fmt.
+    """
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    if fmt == "csv":
+        yield _encode_csv([EXPORT_COLUMNS])
+
+    result = await db.stream(
+        select(*(getattr(Contact, column) for column in EXPORT_COLUMNS))
+        .where(Contact.user_id == user.id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    try:
+        async for rows in result.partitions():
+            yield encode(rows)
+    finally:
+        await result.close()
+        # asyncpg тримає портал серверного курсора до кінця транзакції
+        await db.commit()
@@ -0,0 +1,199 @@
+"""
+Потоковий імпорт контактів з NDJSON або CSV.
+
+Тіло запиту читається шматками, кожен рядок перевіряється ContactCreate, а валідні
+рядки вставляються пачками: COPY на PostgreSQL (asyncpg), багаторядковий INSERT
+на інших діалектах. Звіт (помилки по рядках + підсумок) пишеться у
+SpooledTemporaryFile, тож пам'ять не залежить від розміру файлу. Потоковий лише
+прийом тіла: звіт віддається клієнту після того, як оброблено весь файл.
+"""
+import csv
+import json
+from typing import AsyncIterator, IO, Iterator, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from contacts_api.app.cache import bump_contacts_generation
+from contacts_api.app.models import Contact, User, birthday_key
+from contacts_api.app.schemas import ContactCreate
+from contacts_api.app.settings import get_settings
+
+IMPORT_BATCH_SIZE = get_settings().import_batch_size
+IMPORT_MAX_LINE_BYTES = get_settings().import_max_line_bytes
+
+COPY_COLUMNS = (
+    "first_name", "last_name", "email", "phone",
+    "birthday", "birthday_key", "additional_info", "user_id",
+)
+
+Row = Tuple[int, Optional[dict], Optional[list]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Union[str, list]]:
+    """
+    Розбити потік байтів на рядки UTF-8 без буферизації всього тіла.
+
+    Рядок, який не можна прочитати (довший за IMPORT_MAX_LINE_BYTES байтів або не UTF-8),
+    повертається як список помилок: парсер звітує його як помилку рядка, а тіло читається
+    далі — попередні пачки вже закомічені, тож обривати імпорт без звіту не можна.
+    Задовгий рядок не накопичується, решта його відкидається до наступного перенесення.
+    """
+    buffer = b""
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if oversized or len(line) > IMPORT_MAX_LINE_BYTES:
+                oversized = False
+                yield _line_too_long()
+            else:
+                yield _decode(line)
+        if len(buffer) > IMPORT_MAX_LINE_BYTES:
+            oversized = True
+            buffer = b""
+    if oversized:
+        yield _line_too_long()
+    elif buffer:
+        yield _decode(buffer)
+
+
+def _decode(line: bytes) -> Union[str, list]:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return [{"msg": f"Invalid UTF-8 at byte {e.start}"}]
+
+
+def _line_too_long() -> list:
+    return [{"msg": f"Line longer than {IMPORT_MAX_LINE_BYTES} bytes"}]
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[Union[str, list]]) -> AsyncIterator[Row]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if isinstance(line, list):
+            yield line_no, None, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield line_no, None, [{"msg": "Invalid JSON"}]
+            continue
+        if not isinstance(data, dict):
+            yield line_no, None, [{"msg": "Expected a JSON object"}]
+            continue
+        yield line_no, data, None
+
+
+async def iter_csv_rows(lines: AsyncIterator[Union[str, list]]) -> AsyncIterator[Row]:
+    # Поле в лапках може містити перенесення рядка, тому накопичуємо рядки,
+    # доки кількість лапок не стане парною (екрановані лапки подвоєні, парність зберігається).
+    header = None
+    pending, start = [], 0
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not pending:
+            start = line_no
+        if isinstance(line, list):
+            # запис, до якого належав нечитабельний рядок, відкидається цілком
+            pending = []
+            yield start, None, line
+            continue
+        pending.append(line)
+        if sum(part.count('"') for part in pending) % 2:
+            continue
+
+        text, pending = "\n".join(pending), []
+        try:
+            record = next(csv.reader([text]), [])
+        except csv.Error as e:
+            yield start, None, [{"msg": f"Invalid CSV: {e}"}]
+            continue
+        if not any(value.strip() for value in record):
+            continue
+        if header is None:
+            header = [name.strip() for name in record]
+            continue
+        if len(record) != len(header):
+            yield start, None, [{"msg": f"Expected {len(header)} columns, got {len(record)}"}]
+            continue
+        yield start, {name: (value if value != "" else None) for name, value in zip(header, record)}, None
+
+    if pending:
+        yield start, None, [{"msg": "Unterminated quoted field"}]
+
+
+async def _insert_batch(rows: list, db: AsyncSession):
+    connection = await db.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Contact.__tablename__,
+            records=[tuple(row[column] for column in COPY_COLUMNS) for row in rows],
+            columns=COPY_COLUMNS,
+        )
+    else:
+        await db.execute(insert(Contact), rows)
+    await db.commit()
+
+
+def _report(out: IO[bytes], payload: dict):
+    out.write(json.dumps(payload).encode() + b"\n")
+
+
+async def import_contacts(rows: AsyncIterator[Row], db: AsyncSession, user: User, out: IO[bytes]) -> dict:
+    """
+    Перевірити й вставити рядки пачками по IMPORT_BATCH_SIZE.
+    Кожен відхилений рядок записується в out як {"line": n, "errors": [...]},
+    в кінці — підсумок {"imported": ..., "failed": ...}.
+    """
+    imported = failed = 0
+    batch = []
+    try:
+        async for line_no, data, errors in rows:
+            if errors is None:
+                try:
+                    contact = ContactCreate.model_validate(data)
+                except ValidationError as e:
+                    errors = e.errors(include_url=False, include_context=False, include_input=False)
+            if errors is not None:
+                failed += 1
+                _report(out, {"line": line_no, "errors": errors})
+                continue
+
+            values = contact.model_dump()
+            values["birthday_key"] = birthday_key(contact.birthday)
+            values["user_id"] = user.id
+            batch.append(values)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await _insert_batch(batch, db)
+                imported += len(batch)
+                batch = []
+
+        if batch:
+            await _insert_batch(batch, db)
+            imported += len(batch)
+    finally:
+        # пачки комітяться окремо, тож навіть після збою частину вже вставлено
+        if imported:
+            await bump_contacts_generation(user.id)
+
+    summary = {"imported": imported, "failed": failed}
+    _report(out, summary)
+    return summary
+
+
+def iter_report(out: IO[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    out.seek(0)
+    try:
+        while chunk := out.read(chunk_size):
+            yield chunk
+    finally:
+        out.close()
@@ -1,24 +1,316 @@
+import asyncio
 import json
-import os
+import logging
+import time
+from collections import OrderedDict
+
 import redis.asyncio as redis
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-ENV = os.getenv("ENV", "test")
+from contacts_api.app.metrics import CACHE_LATENCY
+from contacts_api.app.settings import get_settings
+
+settings = get_settings()
+
+REDIS_URL = settings.redis_url
+ENV = settings.env
+
+# Перший рівень кешу: у пам'яті процесу, короткий TTL, обмежений розмір
+LOCAL_USER_CACHE_SIZE = settings.local_user_cache_size
+LOCAL_USER_CACHE_TTL = settings.local_user_cache_ttl
+
+# Записи користувачів оновлюються write-through при кожній зміні, тож TTL може бути довгим
+USER_CACHE_TTL = settings.user_cache_ttl
+
+# Кеш читань контактів: ключі містять покоління користувача, один INCR інвалідовує все
+CONTACT_CACHE_ENABLED = settings.contact_cache_enabled
+CONTACT_CACHE_TTL = settings.contact_cache_ttl
+CONTACT_CACHE_MAX_BYTES = settings.contact_cache_max_bytes
+
+INVALIDATION_CHANNEL = f"{ENV}:cache:invalidate"
+
+# Записати payload, лише якщо в кеші немає новішої версії (ver) того ж користувача.
+# Так читач, що завантажив користувача з БД до зміни, не перезапише свіжий запис.
+_SET_IF_NEWER = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local ok, decoded = pcall(cjson.decode, current)
+    if ok and decoded['ver'] and tonumber(decoded['ver']) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_scripts = {}
+# Lua-скрипти, що реєструються разом з клієнтом (інші модулі додають свої через register_script)
+_script_sources = {"set_if_newer": _SET_IF_NEWER}
+
+
+def get_redis() -> redis.Redis:
+    """
+    Клієнт Redis створюється при першому зверненні, а не під час імпорту.
+    """
+    global _client
+    if _client is None:
+        _client = redis.from_url(REDIS_URL, decode_responses=True)
+        for name, source in _script_sources.items():
+            _scripts[name] = _client.register_script(source)
+    return _client
+
+
+def register_script(name: str, source: str):
+    _script_sources[name] = source
+    if _client is not None:
+        _scripts[name] = _client.register_script(source)
+
+
+def _script(name: str):
+    get_redis()
+    return _scripts[name]
+
+
+def script(name: str):
+    """
+    Скрипт, зареєстрований через register_script, прив'язаний до поточного клієнта.
+    """
+    return _script(name)
+
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _scripts.clear()
+
+
+class LocalTTLCache:
+    """
+    LRU у пам'яті процесу з терміном життя кожного запису.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
 
-r = redis.from_url(REDIS_URL, decode_responses=True)
+_local_users = LocalTTLCache(LOCAL_USER_CACHE_SIZE, LOCAL_USER_CACHE_TTL)
+
+_stats = {
+    "local": {"hits": 0, "misses": 0},
+    "redis": {"hits": 0, "misses": 0},
+    "contacts": {"hits": 0, "misses": 0, "errors": 0},
+}
+
+_listener_task = None
 
 
 def _user_key(user_id: int) -> str:
     return f"{ENV}:user:{user_id}"
 
 
+def _contacts_generation_key(user_id: int) -> str:
+    return f"{ENV}:contacts:{user_id}:gen"
+
+
+def _contacts_key(user_id: int, generation, part: str) -> str:
+    return f"{ENV}:contacts:{user_id}:g{generation}:{part}"
+
+
+def user_payload(user) -> dict:
+    """
+    Те, що кешується про користувача (без хешу пароля); ver — User.version з БД.
+    """
+    return {
+        "id": user.id,
+        "email": user.email,
+        "is_verified": user.is_verified,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "avatar_url": user.avatar_url,
+        "role": user.role,
+        "ver": user.version,
+    }
+
+
+def cache_stats() -> dict:
+    """
+    Лічильники влучань/промахів для кожного рівня кешу.
+    """
+    return {
+        "local": {**_stats["local"], "size": len(_local_users)},
+        "redis": dict(_stats["redis"]),
+        "contacts": dict(_stats["contacts"]),
+    }
+
+
+def clear_local():
+    _local_users.clear()
+
 
 async def get_cached_user(user_id: int):
-    raw = await r.get(_user_key(user_id))
-    return json.loads(raw) if raw else None
+    payload = _local_users.get(user_id)
+    if payload is not None:
+        _stats["local"]["hits"] += 1
+        return payload
+    _stats["local"]["misses"] += 1
 
-async def set_cached_user(user_id: int, payload: dict, ttl: int = 300):
-    await r.set(_user_key(user_id), json.dumps(payload), ex=ttl)
+    with CACHE_LATENCY.time("get_user"):
+        raw = await get_redis().get(_user_key(user_id))
+    if not raw:
+        _stats["redis"]["misses"] += 1
+        return None
+    _stats["redis"]["hits"] += 1
+    payload = json.loads(raw)
+    _local_users.set(user_id, payload)
+    return payload
+
+async def set_cached_user(user_id: int, payload: dict, ttl: int = USER_CACHE_TTL) -> bool:
+    with CACHE_LATENCY.time("set_user"):
+        stored = await _script("set_if_newer")(
+            keys=[_user_key(user_id)],
+            args=[json.dumps(payload), payload.get("ver") or 0, ttl],
+        )
+    if stored:
+        _local_users.set(user_id, payload)
+    return bool(stored)
+
+async def write_through_user(user):
+    """
+    Викликати після кожного commit, що змінює користувача: кладе нову версію в обидва
+    рівні кешу і просить інші воркери забути свої локальні копії. Після Core
+    update(User) об'єкта з новою версією немає — тоді del_cached_user.
+    """
+    await set_cached_user(user.id, user_payload(user))
+    await get_redis().publish(INVALIDATION_CHANNEL, f"user:{user.id}")
 
 async def del_cached_user(user_id: int):
-    await r.delete(_user_key(user_id))
+    _local_users.delete(user_id)
+    await get_redis().delete(_user_key(user_id))
+    # інші воркери теж мають забути локальну копію
+    await get_redis().publish(INVALIDATION_CHANNEL, f"user:{user_id}")
+
+
+async def get_cached_contacts(user_id: int, part: str):
+    """
+    Повертає (покоління, збережений рядок або None). Покоління треба передати
+    в set_cached_contacts, щоб запис, зроблений після інвалідації, ніхто не прочитав.
+    Кеш контактів необов'язковий: коли Redis недоступний, читання йдуть у БД.
+    """
+    if not CONTACT_CACHE_ENABLED:
+        return None, None
+    try:
+        with CACHE_LATENCY.time("get_contacts"):
+            # два GET, а не Lua: ключ запису залежить від покоління, а скрипт мусить знати
+            # всі свої ключі наперед (KEYS). Якщо покоління зміниться між ними, прочитаємо
+            # запис, актуальний мить тому, а записаний під старим поколінням ніхто вже не побачить.
+            generation = await get_redis().get(_contacts_generation_key(user_id)) or "0"
+            value = await get_redis().get(_contacts_key(user_id, generation, part))
+    except Exception:
+        _contacts_cache_failed("read")
+        return None, None
+    _stats["contacts"]["hits" if value is not None else "misses"] += 1
+    return generation, value
+
+async def set_cached_contacts(user_id: int, generation, part: str, value: str):
+    if not CONTACT_CACHE_ENABLED or generation is None or len(value.encode()) > CONTACT_CACHE_MAX_BYTES:
+        return
+    try:
+        with CACHE_LATENCY.time("set_contacts"):
+            await get_redis().set(_contacts_key(user_id, generation, part), value, ex=CONTACT_CACHE_TTL)
+    except Exception:
+        _contacts_cache_failed("write")
+
+async def bump_contacts_generation(user_id: int):
+    """
+    Викликати після кожної зміни контактів користувача: старі записи стають недосяжними
+    і доживають свій TTL.
+
+    Викликається вже після commit, тож збій Redis не має перетворювати успішний запис
+    на 500 (клієнт повторив би неідемпотентне створення). Ціна — до CONTACT_CACHE_TTL
+    застарілих читань, якщо Redis повернеться зі старими записами.
+    """
+    if not CONTACT_CACHE_ENABLED:
+        return
+    try:
+        await get_redis().incr(_contacts_generation_key(user_id))
+    except Exception:
+        _contacts_cache_failed("invalidation")
+
+
+def _contacts_cache_failed(operation: str):
+    _stats["contacts"]["errors"] += 1
+    logger.warning("contact cache %s failed, continuing without it", operation, exc_info=True)
+
+
+def _handle_invalidation(message: str):
+    kind, _, ident = message.partition(":")
+    if kind == "user" and ident.isdigit():
+        _local_users.delete(int(ident))
+
+
+async def _listen_invalidations():
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # повідомлення, пропущені поки не були підписані, могли загубитись
+            _local_users.clear()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    _handle_invalidation(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("cache invalidation listener lost connection, retrying", exc_info=True)
+            _local_users.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+
+def start_invalidation_listener():
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen_invalidations())
+
+
+async def stop_invalidation_listener():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
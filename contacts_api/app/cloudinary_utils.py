@@ -1,23 +1,19 @@
 import cloudinary
-import cloudinary.uploader
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from contacts_api.app.settings import get_settings
 
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True,
-)
+_configured = False
 
 
-def upload_avatar(file, public_id):
-    result = cloudinary.uploader.upload(
-        file,
-        public_id=f"avatars/{public_id}",
-        overwrite=True,
-        folder="avatars"
-    )
-    return result.get("secure_url")
+def _configure():
+    global _configured
+    if not _configured:
+        settings = get_settings()
+        cloudinary.config(
+            cloud_name=settings.cloudinary_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret,
+            secure=True,
+        )
+        _configured = True
+
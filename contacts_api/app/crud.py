@@ -1,12 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import or_
+from sqlalchemy import case, delete, or_, update
 from datetime import date, timedelta
+import calendar
 
-from contacts_api.app.models import Contact, User
+from contacts_api.app.models import Contact, User, birthday_key
 from contacts_api.app.schemas import ContactCreate, ContactUpdate, UserCreate
-from contacts_api.app.hashing import Hasher
-from typing import Optional
+from contacts_api.app.hashing import hashing_pool
+from contacts_api.app import search
+from contacts_api.app.cache import bump_contacts_generation
+from typing import List, Optional, Tuple
 
 
 # Створити контакт
@@ -15,18 +18,29 @@ async def create_contact(contact: ContactCreate, db: AsyncSession, user: User) -
     db.add(new_contact)
     await db.commit()
     await db.refresh(new_contact)
+    await bump_contacts_generation(user.id)
     return new_contact
 
 
 # Отримати список усіх контактів користувача
-async def get_contacts(skip: int, limit: int, db: AsyncSession, user: User):
-    result = await db.execute(
-        select(Contact)
+# after_id вмикає keyset-пагінацію (курсор) замість offset;
+# columns (напр. reads.CONTACT_COLUMNS) — повернути рядки Core замість ORM-об'єктів
+async def get_contacts(
+    skip: int, limit: int, db: AsyncSession, user: User,
+    after_id: Optional[int] = None, columns: Optional[tuple] = None,
+):
+    stmt = (
+        select(*(columns or (Contact,)))
         .filter(Contact.user_id == user.id)
-        .offset(skip)
-        .limit(limit)
+        .order_by(Contact.id)
     )
-    return result.scalars().all()
+    if after_id is not None:
+        stmt = stmt.filter(Contact.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+
+    result = await db.execute(stmt.limit(limit))
+    return result.all() if columns else result.scalars().all()
 
 
 # Отримати один контакт за ID (якщо належить користувачу)
@@ -38,66 +52,107 @@ async def get_contact(contact_id: int, db: AsyncSession, user: User):
     return result.scalar_one_or_none()
 
 
-# Оновити контакт
+def _contact_filter(contact_id: int, user: User):
+    return (Contact.id == contact_id) & (Contact.user_id == user.id)
+
+
+# Оновити контакт: один UPDATE ... RETURNING, якщо діалект його підтримує
 async def update_contact(contact_id: int, updated: ContactUpdate, db: AsyncSession, user: User):
-    result = await db.execute(
-        select(Contact)
-        .filter(Contact.id == contact_id, Contact.user_id == user.id)
-    )
-    contact = result.scalar_one_or_none()
+    values = updated.dict(exclude_unset=True)
+    if not values:
+        return await get_contact(contact_id, db, user)
+
+    if db.get_bind().dialect.update_returning:
+        if "birthday" in values:
+            # @validates не спрацьовує для UPDATE-виразу
+            values["birthday_key"] = birthday_key(values["birthday"])
+        result = await db.execute(
+            update(Contact)
+            .where(_contact_filter(contact_id, user))
+            .values(**values)
+            .returning(Contact)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        contact = result.scalar_one_or_none()
+        await db.commit()
+    else:
+        contact = await get_contact(contact_id, db, user)
+        if contact:
+            for key, value in values.items():
+                setattr(contact, key, value)
+            await db.commit()
+            await db.refresh(contact)
 
     if contact:
-        for key, value in updated.dict(exclude_unset=True).items():
-            setattr(contact, key, value)
-        await db.commit()
-        await db.refresh(contact)
+        await bump_contacts_generation(user.id)
     return contact
 
 
-# Видалити контакт
+# Видалити контакт: один DELETE ... RETURNING, якщо діалект його підтримує
 async def delete_contact(contact_id: int, db: AsyncSession, user: User):
-    result = await db.execute(
-        select(Contact)
-        .filter(Contact.id == contact_id, Contact.user_id == user.id)
-    )
-    contact = result.scalar_one_or_none()
+    if db.get_bind().dialect.delete_returning:
+        result = await db.execute(
+            delete(Contact)
+            .where(_contact_filter(contact_id, user))
+            .returning(Contact)
+            .execution_options(synchronize_session=False)
+        )
+        contact = result.scalar_one_or_none()
+        await db.commit()
+    else:
+        contact = await get_contact(contact_id, db, user)
+        if contact:
+            await db.delete(contact)
+            await db.commit()
 
     if contact:
-        await db.delete(contact)
-        await db.commit()
+        await bump_contacts_generation(user.id)
     return contact
 
 
-# Пошук контактів (ім’я, прізвище, email)
-async def search_contacts(query: str, db: AsyncSession, user: User):
-    result = await db.execute(
-        select(Contact)
-        .where(
-            Contact.user_id == user.id,
-            or_(
-                Contact.first_name.ilike(f"%{query}%"),
-                Contact.last_name.ilike(f"%{query}%"),
-                Contact.email.ilike(f"%{query}%"),
-            )
-        )
-    )
-    return result.scalars().all()
+# Пошук контактів (ім’я, прізвище, email) з ранжуванням, див. search.py
+async def search_contacts(
+    query: str, db: AsyncSession, user: User, limit: int = 50, after: Optional[Tuple[int, int]] = None,
+    columns: Optional[tuple] = None,
+):
+    return await search.search_contacts(query, limit, db, user, after=after, columns=columns)
+
+
+def birthday_ranges(today: date, days: int) -> List[Tuple[int, int]]:
+    """
+    Діапазони birthday_key, що потрапляють у вікно [today, today + days].
+    Через кінець року вікно розпадається на два діапазони. У невисокосний рік
+    день народження 29 лютого святкується 28 лютого.
+    """
+    if days >= 365:
+        return [(101, 1231)]
 
+    end = today + timedelta(days=days)
+    start_key, end_key = birthday_key(today), birthday_key(end)
+    if end_key == 228 and not calendar.isleap(end.year):
+        end_key = 229
 
-# Контакти з днями народження на найближчі 7 днів
-async def get_upcoming_birthdays(db: AsyncSession, user: User):
+    if start_key <= end_key:
+        return [(start_key, end_key)]
+    return [(start_key, 1231), (101, end_key)]
+
+
+# Контакти з днями народження на найближчі days днів (за замовчуванням 7)
+async def get_upcoming_birthdays(db: AsyncSession, user: User, days: int = 7, columns: Optional[tuple] = None):
     today = date.today()
-    in_seven_days = today + timedelta(days=7)
+    ranges = birthday_ranges(today, days)
+    # спочатку ті, що ще цього року, потім — після переходу через 31 грудня
+    upcoming_order = case((Contact.birthday_key >= ranges[0][0], 0), else_=1)
 
     result = await db.execute(
-        select(Contact)
+        select(*(columns or (Contact,)))
         .where(
             Contact.user_id == user.id,
-            Contact.birthday.isnot(None),
-            Contact.birthday.between(today, in_seven_days)
+            or_(*(Contact.birthday_key.between(lo, hi) for lo, hi in ranges)),
         )
+        .order_by(upcoming_order, Contact.birthday_key, Contact.id)
     )
-    return result.scalars().all()
+    return result.all() if columns else result.scalars().all()
 
 
 async def get_contact_by_id(contact_id: int, user: User, db: AsyncSession) -> Optional[Contact]:
@@ -109,7 +164,7 @@ async def get_contact_by_id(contact_id: int, user: User, db: AsyncSession) -> Op
 async def create_user(user_data: UserCreate, db: AsyncSession) -> User:
     new_user = User(
         email=user_data.email,
-        password=Hasher.get_password_hash(user_data.password)
+        hashed_password=await hashing_pool.hash(user_data.password)
     )
     db.add(new_user)
     await db.commit()
@@ -1,38 +1,163 @@
-import os
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from contacts_api.app import metrics, profiler
+from contacts_api.app.settings import get_settings
 
 Base = declarative_base()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+settings = get_settings()
+
+DATABASE_URL = settings.database_url
+TEST_DATABASE_URL = settings.test_database_url
+
+# Налаштування рушія; echo: false | true | debug (true/debug логують кожен SQL із параметрами)
+DB_ECHO = settings.db_echo
+DB_POOL_SIZE = settings.db_pool_size
+DB_MAX_OVERFLOW = settings.db_max_overflow
+DB_POOL_TIMEOUT = settings.db_pool_timeout
+DB_POOL_RECYCLE = settings.db_pool_recycle
+DB_POOL_PRE_PING = settings.db_pool_pre_ping
+# кеш prepared statements asyncpg; 0 — якщо перед БД стоїть pgbouncer у transaction mode
+DB_STATEMENT_CACHE_SIZE = settings.db_statement_cache_size
+
+# Рушії й фабрики сесій створюються при першому зверненні (get_engine / get_test_engine)
+_engines = {}
+_sessionmakers = {}
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул з'єднань, що рахує, скільки часу запити чекали на вільне з'єднання.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def _echo_setting(value: str):
+    if value == "debug":
+        return "debug"
+    return value in ("1", "true", "yes")
+
+
+def make_engine(url: str) -> AsyncEngine:
+    """
+    Створити async-рушій з налаштуваннями DB_* із оточення.
+    """
+    options = {"echo": _echo_setting(DB_ECHO), "pool_pre_ping": DB_POOL_PRE_PING}
+    backend = make_url(url)
+    if backend.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if backend.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+    engine = create_async_engine(url, **options)
+    metrics.instrument_engine(engine.sync_engine)
+    profiler.instrument_engine(engine.sync_engine)
+    return engine
+
+
+def pool_stats(target: Optional[AsyncEngine] = None) -> dict:
+    """
+    Поточний стан пулу: зайняті/вільні з'єднання, overflow і час очікування.
+    """
+    pool = (target or get_engine()).pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            wait_count=pool.wait_count,
+            wait_seconds_total=pool.wait_seconds_total,
+            wait_seconds_max=pool.wait_seconds_max,
+            timeouts=pool.timeouts,
+        )
+    return stats
+
+
+def _get_engine(name: str, url: Optional[str]) -> AsyncEngine:
+    if name not in _engines:
+        if not url:
+            raise RuntimeError(f"{name} is missing")
+        _engines[name] = make_engine(url)
+        _sessionmakers[name] = async_sessionmaker(
+            bind=_engines[name], class_=AsyncSession, expire_on_commit=False
+        )
+    return _engines[name]
+
+
+def get_engine() -> AsyncEngine:
+    return _get_engine("DATABASE_URL", DATABASE_URL)
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    get_engine()
+    return _sessionmakers["DATABASE_URL"]
+
+
+def get_test_engine() -> AsyncEngine:
+    return _get_engine("TEST_DATABASE_URL", TEST_DATABASE_URL)
 
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is missing")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+async def dispose_engines():
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _sessionmakers.clear()
 
-# IMPORTANT: for tests we must always have engine_test if TEST_DATABASE_URL exists
-engine_test = None
-async_session_test = None
 
-if TEST_DATABASE_URL:
-    engine_test = create_async_engine(TEST_DATABASE_URL, echo=True)
-    async_session_test = async_sessionmaker(
-        bind=engine_test, class_=AsyncSession, expire_on_commit=False
-    )
+def __getattr__(name: str):
+    # сумісність зі старим кодом: database.engine / database.async_session
+    if name == "engine":
+        return get_engine()
+    if name == "async_session":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
+    async with get_sessionmaker()() as session:
         yield session
 
 
 async def get_test_session() -> AsyncGenerator[AsyncSession, None]:
-    if async_session_test is None:
-        raise RuntimeError("TEST_DATABASE_URL is missing (cannot init test db)")
-    async with async_session_test() as session:
+    get_test_engine()
+    async with _sessionmakers["TEST_DATABASE_URL"]() as session:
         yield session
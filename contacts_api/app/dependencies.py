@@ -4,7 +4,7 @@ from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from contacts_api.app.cache import set_cached_user, get_cached_user
+from contacts_api.app.cache import set_cached_user, get_cached_user, user_payload
 from contacts_api.app.database import get_db
 from contacts_api.app.jwt_utils import decode_access_token
 from contacts_api.app.models import User
@@ -32,6 +32,7 @@ async def get_current_user(
             is_verified=cached["is_verified"],
             avatar_url=cached.get("avatar_url"),
             role=cached.get("role", "user"),
+            version=cached.get("ver"),
         )
         return u
 
@@ -42,18 +43,7 @@ async def get_current_user(
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    await set_cached_user(
-        user.id,
-        {
-            "id": user.id,
-            "email": user.email,
-            "is_verified": user.is_verified,
-            "created_at": user.created_at.isoformat() if user.created_at else None,
-            "avatar_url": user.avatar_url,
-            "role": user.role,
-        },
-        ttl=300,
-    )
+    await set_cached_user(user.id, user_payload(user))
     return user
 
 async def admin_required(current_user: User = Depends(get_current_user)) -> User:
@@ -1,33 +1,29 @@
-from fastapi import BackgroundTasks
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from contacts_api.app.settings import get_settings
 
-SMTP_USER = os.getenv("SMTP_USER")
-SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
-SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
-SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 
-def send_verification_email(email_to: str, token: str):
+def build_verification_message(email_to: str, token: str) -> MIMEMultipart:
     verify_link = f"http://127.0.0.1:8000/auth/verify-email/{token}"
 
     msg = MIMEMultipart("alternative")
     msg["Subject"] = "Verify your email"
-    msg["From"] = SMTP_USER
+    msg["From"] = get_settings().smtp_user
     msg["To"] = email_to
 
     text = f"Click the link to verify your email: {verify_link}"
     msg.attach(MIMEText(text, "plain"))
+    return msg
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.sendmail(SMTP_USER, email_to, msg.as_string())
-
-def send_password_reset_email(email: str, token: str):
+def build_password_reset_message(email: str, token: str) -> MIMEMultipart:
     reset_link = f"http://localhost:8000/auth/reset-password/{token}"
-    print(f"📧 Password reset link for {email}: {reset_link}")
+
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = "Reset your password"
+    msg["From"] = get_settings().smtp_user
+    msg["To"] = email
+
+    text = f"Click the link to reset your password: {reset_link}"
+    msg.attach(MIMEText(text, "plain"))
+    return msg
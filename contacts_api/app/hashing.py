@@ -1,7 +1,18 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
+from contacts_api.app.metrics import HASH_LATENCY
+from contacts_api.app.settings import get_settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+HASH_POOL_WORKERS = get_settings().hash_pool_workers
+HASH_POOL_MAX_QUEUE = get_settings().hash_pool_max_queue
+
 
 class Hasher:
     @staticmethod
@@ -11,3 +22,98 @@ class Hasher:
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingPoolSaturated(Exception):
+    """
+    Черга хешування переповнена — запит треба відхилити (503), а не ставити в чергу.
+    """
+
+
+class HashingPool:
+    """
+    Окремий обмежений пул потоків для bcrypt, щоб хешування не блокувало event loop.
+
+    Черга обмежена max_queue завданнями, що чекають на вільний потік; понад це
+    run() одразу кидає HashingPoolSaturated.
+    """
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_queue: int = HASH_POOL_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._pending - self._running)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _timed(self, submitted: float, fn, *args):
+        started = time.perf_counter()
+        waited = started - submitted
+        with self._lock:
+            self._running += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+                self.run_seconds_total += time.perf_counter() - started
+
+    async def run(self, fn, *args):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HashingPoolSaturated()
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), self._timed, time.perf_counter(), fn, *args
+            )
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        with HASH_LATENCY.time("hash"):
+            return await self.run(pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        with HASH_LATENCY.time("verify"):
+            return await self.run(pwd_context.verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "running": self._running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+            "run_seconds_total": self.run_seconds_total,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+hashing_pool = HashingPool()
@@ -1,31 +1,53 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
 
-import os
-from dotenv import load_dotenv
+from contacts_api.app.cache import LocalTTLCache
+from contacts_api.app.settings import get_settings
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
+SECRET_KEY = get_settings().secret_key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 
+# Вже перевірені access-токени: sha256(token) -> payload, запис живе до exp токена.
+# Кеш у пам'яті процесу, а SECRET_KEY читається один раз при старті: новий ключ
+# означає перезапуск, тож токени, перевірені старим ключем, зникають разом із кешем.
+TOKEN_CACHE_SIZE = get_settings().token_cache_size
+
+_verified_tokens = LocalTTLCache(TOKEN_CACHE_SIZE, ttl=0)
+_token_stats = {"hits": 0, "misses": 0}
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def token_cache_stats() -> dict:
+    return {**_token_stats, "size": len(_verified_tokens)}
+
 def decode_access_token(token: str):
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _verified_tokens.get(digest)
+    if payload is not None:
+        _token_stats["hits"] += 1
+        return dict(payload)
+    _token_stats["misses"] += 1
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)) and exp > time.time():
+        _verified_tokens.set(digest, payload, ttl=exp - time.time())
+    return dict(payload)
+
 def create_email_token(email: str, expires_minutes: int = 60):
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
     to_encode = {"sub": email, "exp": expire}
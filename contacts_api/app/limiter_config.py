@@ -1,4 +1,180 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+"""
+Розподілений rate limiter на Redis (ковзне вікно).
 
-limiter = Limiter(key_func=get_remote_address)
+Лічильники живуть у Redis, тож ліміт спільний для всіх воркерів і подів. Ключ —
+id користувача з access token, інакше IP клієнта. Рішення приймає Lua-скрипт
+атомарно (ковзне вікно з двох фіксованих: поточне + зважене попереднє).
+
+Щоб не робити round trip на кожен запит:
+  - відмова кешується локально до моменту, коли ліміт знову дозволить запит;
+  - для великих лімітів скрипт видає «оренду» на кілька запитів одразу, і наступні
+    запити витрачають її локально (зайві токени оренди просто згорають через
+    RATE_LIMIT_LEASE_TTL — ліміт від цього лише суворіший).
+
+Ліміт на маршрут: dependencies=[Depends(rate_limit("scope", "5/minute"))];
+RATE_LIMITS="scope=10/minute,..." в оточенні перекриває значення з коду.
+"""
+import logging
+import math
+import time
+from typing import Tuple
+
+from fastapi import HTTPException, Request, status
+from jose import JWTError
+
+from contacts_api.app.cache import LocalTTLCache, register_script, script
+from contacts_api.app.jwt_utils import decode_access_token
+from contacts_api.app.settings import get_settings
+
+settings = get_settings()
+
+RATE_LIMITS = settings.rate_limits
+RATE_LIMIT_ENABLED = settings.rate_limit_enabled
+RATE_LIMIT_LEASE_SIZE = settings.rate_limit_lease_size
+RATE_LIMIT_LEASE_TTL = settings.rate_limit_lease_ttl
+# брати IP з X-Forwarded-For (лише якщо перед застосунком довірений проксі)
+RATE_LIMIT_TRUST_FORWARDED = settings.rate_limit_trust_forwarded
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# KEYS: лічильник поточного вікна, попереднього; ARGV: limit, window_ms, elapsed_ms, want
+# Повертає {видано, залишок, через скільки мс повторити}
+_SLIDING_WINDOW = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local want = tonumber(ARGV[4])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local available = limit - (previous * (window - elapsed) / window + current)
+if available < 1 then
+    local retry = window - elapsed
+    if previous > 0 and current < limit then
+        retry = window - (limit - 1 - current) * window / previous - elapsed
+    end
+    return {0, 0, math.max(1, math.ceil(retry))}
+end
+local granted = math.min(want, math.floor(available))
+redis.call('INCRBY', KEYS[1], granted)
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {granted, math.floor(available - granted), 0}
+"""
+
+register_script("sliding_window", _SLIDING_WINDOW)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    "5/minute" -> (5, 60000): кількість запитів і вікно в мілісекундах.
+    """
+    count, _, period = rate.partition("/")
+    if period not in PERIODS:
+        raise ValueError(f"Invalid rate: {rate}")
+    return int(count), PERIODS[period] * 1000
+
+
+class SlidingWindowLimiter:
+    def __init__(self, lease_size: int = RATE_LIMIT_LEASE_SIZE, lease_ttl: float = RATE_LIMIT_LEASE_TTL):
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self._leases = LocalTTLCache(10_000, lease_ttl)
+        self._blocked = LocalTTLCache(10_000, 1)
+        self.stats = {"local": 0, "redis": 0, "denied": 0, "errors": 0}
+
+    def clear(self):
+        self._leases.clear()
+        self._blocked.clear()
+
+    def _lease_for(self, limit: int) -> int:
+        # малі ліміти рахуємо точно, великі — порціями до lease_size
+        return max(1, min(self.lease_size, limit // 10))
+
+    async def hit(self, scope: str, ident: str, limit: int, window_ms: int) -> Tuple[bool, int]:
+        """
+        Врахувати один запит. Повертає (дозволено, через скільки секунд повторити).
+        """
+        key = f"{scope}:{ident}"
+        retry_at = self._blocked.get(key)
+        if retry_at is not None:
+            self.stats["denied"] += 1
+            return False, max(1, math.ceil(retry_at - time.monotonic()))
+
+        lease = self._leases.get(key)
+        if lease:
+            lease[0] -= 1
+            if lease[0] <= 0:
+                self._leases.delete(key)
+            self.stats["local"] += 1
+            return True, 0
+
+        now_ms = int(time.time() * 1000)
+        index, elapsed = divmod(now_ms, window_ms)
+        prefix = f"{settings.env}:rl:{{{key}}}:{window_ms}"
+        try:
+            granted, _, retry_ms = await script("sliding_window")(
+                keys=[f"{prefix}:{index}", f"{prefix}:{index - 1}"],
+                args=[limit, window_ms, elapsed, self._lease_for(limit)],
+            )
+        except Exception:
+            # недоступний Redis не повинен класти API: пропускаємо запит
+            self.stats["errors"] += 1
+            logger.warning("rate limiter unavailable, allowing request", exc_info=True)
+            return True, 0
+        self.stats["redis"] += 1
+
+        if not granted:
+            self._blocked.set(key, time.monotonic() + retry_ms / 1000, ttl=retry_ms / 1000)
+            self.stats["denied"] += 1
+            return False, max(1, math.ceil(retry_ms / 1000))
+        if granted > 1:
+            self._leases.set(key, [granted - 1])
+        return True, 0
+
+
+rate_limiter = SlidingWindowLimiter()
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit_identity(request: Request) -> str:
+    """
+    Автентифікований користувач — за id (спільна IP за балансувальником не заважає),
+    анонім — за IP.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            sub = decode_access_token(token).get("sub")
+            if sub:
+                return f"user:{sub}"
+        except (HTTPException, JWTError, ValueError):
+            pass
+    return f"ip:{client_ip(request)}"
+
+
+def rate_limit(scope: str, default: str):
+    """
+    Залежність FastAPI: не більше default (або RATE_LIMITS[scope]) запитів на ідентичність.
+    """
+    limit, window_ms = parse_rate(RATE_LIMITS.get(scope, default))
+
+    async def dependency(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        allowed, retry_after = await rate_limiter.hit(scope, rate_limit_identity(request), limit, window_ms)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    return dependency
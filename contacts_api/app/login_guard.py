@@ -0,0 +1,151 @@
+"""
+Захист /api/auth/login від перебору паролів.
+
+Три рівні, і всі перевіряються одним pipeline до запиту в БД і до bcrypt:
+  - лічильники невдалих спроб на акаунт і на IP (вікно LOGIN_FAILURE_WINDOW);
+    після LOGIN_*_FREE_ATTEMPTS кожна нова невдача ставить блокування, що
+    подвоюється (LOGIN_LOCKOUT_BASE * 2^n, не довше LOGIN_LOCKOUT_MAX) — 429;
+  - кеш відомо хибних пар (email, HMAC пароля) на LOGIN_BAD_PAIR_TTL: повтор тієї ж
+    пари одразу отримує 401 без хешування;
+  - успішний вхід скидає лічильник акаунта.
+
+Email і пароль у ключах Redis зберігаються лише як HMAC з SECRET_KEY.
+"""
+import hashlib
+import hmac
+import logging
+import math
+
+from fastapi import HTTPException, status
+
+from contacts_api.app.cache import get_redis, register_script, script
+from contacts_api.app.settings import get_settings
+
+settings = get_settings()
+
+LOGIN_FAILURE_WINDOW = settings.login_failure_window
+LOGIN_ACCOUNT_FREE_ATTEMPTS = settings.login_account_free_attempts
+LOGIN_IP_FREE_ATTEMPTS = settings.login_ip_free_attempts
+LOGIN_LOCKOUT_BASE = settings.login_lockout_base
+LOGIN_LOCKOUT_MAX = settings.login_lockout_max
+LOGIN_BAD_PAIR_TTL = settings.login_bad_pair_ttl
+
+# KEYS: лічильник акаунта, лічильник IP, блок акаунта, блок IP, хибні пари акаунта
+# ARGV: вікно, безкоштовні спроби акаунта, IP, база блокування, максимум, digest пари, TTL пари
+_RECORD_FAILURE = """
+local function bump(fail_key, lock_key, free)
+    local failures = redis.call('INCR', fail_key)
+    if failures == 1 then
+        redis.call('EXPIRE', fail_key, ARGV[1])
+    end
+    -- перші free невдач безкоштовні, кожна наступна блокує вдвічі довше
+    if failures > free then
+        local lock = math.min(tonumber(ARGV[5]), tonumber(ARGV[4]) * 2 ^ (failures - free - 1))
+        redis.call('SET', lock_key, 1, 'PX', math.floor(lock * 1000))
+    end
+end
+redis.call('HSET', KEYS[5], ARGV[6], 1)
+redis.call('EXPIRE', KEYS[5], ARGV[7])
+bump(KEYS[1], KEYS[3], tonumber(ARGV[2]))
+bump(KEYS[2], KEYS[4], tonumber(ARGV[3]))
+"""
+
+register_script("login_failure", _RECORD_FAILURE)
+
+logger = logging.getLogger(__name__)
+
+_stats = {"locked": 0, "known_bad": 0, "failures": 0}
+
+
+def _hmac(value: str) -> str:
+    return hmac.new((settings.secret_key or "").encode(), value.encode(), hashlib.sha256).hexdigest()
+
+
+def _account(email: str) -> str:
+    return _hmac(email.strip().lower())
+
+
+def _bad_pairs_key(account: str) -> str:
+    return f"{settings.env}:login:bad:{account}"
+
+
+def login_guard_stats() -> dict:
+    return dict(_stats)
+
+
+class LoginAttempt:
+    def __init__(self, email: str, password: str, ip: str):
+        self.account = _account(email)
+        self.pair = _hmac(f"{self.account}\0{password}")
+        prefix = f"{settings.env}:login"
+        self.keys = {
+            "account_failures": f"{prefix}:fail:acct:{self.account}",
+            "ip_failures": f"{prefix}:fail:ip:{ip}",
+            "account_lock": f"{prefix}:lock:acct:{self.account}",
+            "ip_lock": f"{prefix}:lock:ip:{ip}",
+            "bad_pairs": _bad_pairs_key(self.account),
+        }
+
+    async def check(self):
+        """
+        Кинути 429, якщо акаунт або IP заблоковано, і 401, якщо пару вже бачили хибною.
+        """
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.pttl(self.keys["account_lock"])
+                pipe.pttl(self.keys["ip_lock"])
+                pipe.hexists(self.keys["bad_pairs"], self.pair)
+                account_lock, ip_lock, known_bad = await pipe.execute()
+        except Exception:
+            # без Redis вхід працює як раніше, лише без захисту
+            logger.warning("login guard unavailable", exc_info=True)
+            return
+
+        lock_ms = max(account_lock, ip_lock)
+        if lock_ms > 0:
+            _stats["locked"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts, try again later",
+                headers={"Retry-After": str(max(1, math.ceil(lock_ms / 1000)))},
+            )
+        if known_bad:
+            _stats["known_bad"] += 1
+            await self.failed()
+
+    async def failed(self):
+        """
+        Врахувати невдалу спробу і кинути 401.
+        """
+        _stats["failures"] += 1
+        try:
+            await script("login_failure")(
+                keys=[
+                    self.keys["account_failures"], self.keys["ip_failures"],
+                    self.keys["account_lock"], self.keys["ip_lock"], self.keys["bad_pairs"],
+                ],
+                args=[
+                    LOGIN_FAILURE_WINDOW, LOGIN_ACCOUNT_FREE_ATTEMPTS, LOGIN_IP_FREE_ATTEMPTS,
+                    LOGIN_LOCKOUT_BASE, LOGIN_LOCKOUT_MAX, self.pair, LOGIN_BAD_PAIR_TTL,
+                ],
+            )
+        except Exception:
+            logger.warning("login guard unavailable", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    async def succeeded(self):
+        try:
+            await get_redis().delete(self.keys["account_failures"])
+        except Exception:
+            logger.warning("login guard unavailable", exc_info=True)
+
+
+async def forget_account(email: str):
+    """
+    Викликати, коли пароль акаунта міг змінитися (реєстрація, скидання пароля):
+    пари, закешовані як хибні, можуть стати правильними.
+    """
+    try:
+        await get_redis().delete(_bad_pairs_key(_account(email)))
+    except Exception:
+        logger.warning("login guard unavailable", exc_info=True)
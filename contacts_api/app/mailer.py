@@ -0,0 +1,233 @@
+"""
+Асинхронна доставка пошти.
+
+Листи ставляться в asyncio-чергу; pool_size воркерів забирають їх пачками до
+batch_size і відправляють через власне постійне (вже автентифіковане) SMTP-з'єднання
+у виділеному пулі потоків, не чіпаючи спільний threadpool Starlette. Тимчасові
+помилки повторюються з експоненційною затримкою, постійні (5xx) — ні.
+"""
+import asyncio
+import logging
+import smtplib
+import ssl
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import Optional
+
+from contacts_api.app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def is_permanent(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+class _Envelope:
+    __slots__ = ("message", "future", "attempts")
+
+    def __init__(self, message: Message, future: asyncio.Future):
+        self.message = message
+        self.future = future
+        self.attempts = 0
+
+
+class SMTPConnection:
+    """
+    Одне постійне SMTP-з'єднання; відкривається при першій відправці і
+    перевідкривається, якщо сервер його закрив.
+    """
+
+    def __init__(self, mailer: "Mailer"):
+        self._mailer = mailer
+        self._smtp = None
+
+    def _open(self):
+        mailer = self._mailer
+        smtp = smtplib.SMTP(mailer.host, mailer.port, timeout=mailer.timeout)
+        smtp.ehlo()
+        if mailer.starttls and smtp.has_extn("starttls"):
+            smtp.starttls(context=ssl.create_default_context())
+            smtp.ehlo()
+        if mailer.username:
+            smtp.login(mailer.username, mailer.password)
+        self._smtp = smtp
+        mailer.stats["connections"] += 1
+
+    def send(self, message: Message):
+        for attempt in (1, 2):
+            if self._smtp is None:
+                self._open()
+            try:
+                self._smtp.send_message(message)
+                return
+            except smtplib.SMTPServerDisconnected:
+                # сервер закрив бездіяльне з'єднання — одна спроба з новим
+                self._smtp = None
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+class Mailer:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        pool_size: int = 2,
+        batch_size: int = 20,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "batches": 0, "connections": 0}
+        self._queue = None
+        self._executor = None
+        self._workers = []
+        self._in_flight = 0
+        self._idle = None
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="smtp")
+        self._workers = [
+            asyncio.create_task(self._worker(SMTPConnection(self))) for _ in range(self.pool_size)
+        ]
+
+    def submit(self, message: Message) -> asyncio.Future:
+        """
+        Поставити лист у чергу. Повертає future, що завершується після доставки
+        (або з помилкою, коли спроби вичерпано); чекати на нього не обов'язково.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        # помилку вже записано в лог; не даємо asyncio скаржитись на непрочитаний exception
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight += 1
+        self._idle.clear()
+        self._queue.put_nowait(_Envelope(message, future))
+        return future
+
+    async def send(self, message: Message):
+        await self.submit(message)
+
+    async def flush(self):
+        """
+        Дочекатися, поки всі поставлені листи буде доставлено або відхилено.
+        """
+        if self._workers:
+            await self._idle.wait()
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _worker(self, connection: SMTPConnection):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                errors = await loop.run_in_executor(self._executor, self._deliver, connection, batch)
+                self.stats["batches"] += 1
+                for envelope, error in zip(batch, errors):
+                    self._settle(envelope, error)
+        finally:
+            await loop.run_in_executor(self._executor, connection.close)
+
+    @staticmethod
+    def _deliver(connection: SMTPConnection, batch: list) -> list:
+        errors = []
+        for envelope in batch:
+            try:
+                connection.send(envelope.message)
+                errors.append(None)
+            except Exception as e:
+                if not is_permanent(e):
+                    connection.close()
+                errors.append(e)
+        return errors
+
+    def _settle(self, envelope: _Envelope, error: Optional[Exception]):
+        if error is not None and not is_permanent(error) and envelope.attempts < self.max_retries:
+            envelope.attempts += 1
+            self.stats["retried"] += 1
+            delay = self.retry_backoff * 2 ** (envelope.attempts - 1)
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, envelope)
+            return
+
+        if error is None:
+            self.stats["sent"] += 1
+            envelope.future.set_result(None)
+        else:
+            self.stats["failed"] += 1
+            logger.error("giving up on email to %s: %s", envelope.message["To"], error)
+            envelope.future.set_exception(error)
+
+        self._in_flight -= 1
+        if self._in_flight == 0:
+            self._idle.set()
+
+
+_mailer = None
+
+
+def get_mailer() -> Mailer:
+    global _mailer
+    if _mailer is None:
+        settings = get_settings()
+        _mailer = Mailer(
+            host=settings.smtp_host,
+            port=settings.smtp_port,
+            username=settings.smtp_user,
+            password=settings.smtp_password,
+            starttls=settings.smtp_starttls,
+            pool_size=settings.smtp_pool_size,
+            batch_size=settings.smtp_batch_size,
+            max_retries=settings.smtp_max_retries,
+            retry_backoff=settings.smtp_retry_backoff,
+            timeout=settings.smtp_timeout,
+        )
+    return _mailer
+
+
+async def close_mailer():
+    global _mailer
+    if _mailer is not None:
+        await _mailer.stop()
+        _mailer = None
@@ -1,21 +1,38 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.errors import RateLimitExceeded
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from contacts_api.app.routes import router as contacts_router
-from contacts_api.app.routes_auth import router as auth_router, ratelimit_handler
+from contacts_api.app.routes_auth import router as auth_router, hashing_busy_handler
+from contacts_api.app.hashing import HashingPoolSaturated
+
+from contacts_api.app.cache import start_invalidation_listener, stop_invalidation_listener, close_redis
+from contacts_api.app.database import dispose_engines
+from contacts_api.app.hashing import hashing_pool
+from contacts_api.app.mailer import close_mailer
+from contacts_api.app.metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics
+from contacts_api.app.pagination import NEXT_CURSOR_HEADER
+from contacts_api.app.profiler import PROFILER_HEADERS, SQLProfilerMiddleware, router as profiler_router
+from contacts_api.app.storage import AVATAR_STORAGE, AVATAR_LOCAL_ROOT, AVATAR_LOCAL_URL
+
 
-from contacts_api.app.limiter_config import limiter
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # рушій БД, Redis, пул хешування і поштові воркери створюються ліниво; тут лише прибираємо те, що виникло
+    start_invalidation_listener()
+    yield
+    await stop_invalidation_listener()
+    await close_mailer()
+    await close_redis()
+    await dispose_engines()
+    hashing_pool.shutdown()
 
-app = FastAPI(redirect_slashes=False)
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
-app.add_exception_handler(RateLimitExceeded, ratelimit_handler)
+
+app = FastAPI(redirect_slashes=False, lifespan=lifespan)
+app.add_exception_handler(HashingPoolSaturated, hashing_busy_handler)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,7 +40,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Retry-After", *PROFILER_HEADERS],
 )
+app.add_middleware(SQLProfilerMiddleware)
+# останнім доданий — зовнішній: міряє й відповіді CORS та обробників помилок
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 app.include_router(contacts_router)
+app.include_router(profiler_router)
+
+if AVATAR_STORAGE == "local":
+    # локальне сховище аватарів віддається тим самим застосунком
+    app.mount(AVATAR_LOCAL_URL, StaticFiles(directory=AVATAR_LOCAL_ROOT, check_dir=False), name="media")
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,319 @@
+"""
+Метрики у текстовому форматі Prometheus (GET /metrics).
+
+Власний мінімальний реєстр: лічильники й гістограми — це словники з кортежами
+міток, оновлюються з event loop без блокувань, тож накладні витрати — кілька
+операцій зі словником на подію. Поточний стан пулів і кешів не дублюється в
+реєстрі, а збирається колекторами в момент запиту /metrics.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from contacts_api.app.settings import get_settings
+
+METRICS_ENABLED = get_settings().metrics_enabled
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for name, value in zip(names, values)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        self.name = f"{name}_total"
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # мітки -> [лічильники по кошиках (без кумуляції), сума, кількість]
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def time(self, *labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def count(self, *labels) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+# колектор повертає [(ім'я, тип, опис, [(мітки-словник, значення), ...]), ...]
+Collector = Callable[[], List[Tuple[str, str, str, List[Tuple[dict, float]]]]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Labels = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Labels = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels, labels.values())} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter("http_requests", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+DB_QUERIES = registry.counter("db_queries", "SQL statements executed")
+DB_QUERY_LATENCY = registry.histogram("db_query_duration_seconds", "SQL statement latency")
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    "db_queries_per_request", "SQL statements per HTTP request", ("route",), buckets=COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = registry.histogram("db_time_per_request_seconds", "Time in SQL per HTTP request", ("route",))
+CACHE_LATENCY = registry.histogram("cache_operation_duration_seconds", "Redis cache operation latency", ("operation",))
+HASH_LATENCY = registry.histogram("password_hash_duration_seconds", "bcrypt hash/verify latency incl. queueing", ("operation",))
+STORAGE_LATENCY = registry.histogram("avatar_upload_duration_seconds", "Avatar upload latency", ("backend",))
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+# статистика SQL поточного HTTP-запиту (None поза запитом)
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    DB_QUERIES.inc()
+    DB_QUERY_LATENCY.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+def instrument_engine(sync_engine):
+    """
+    Підписатися на події рушія: кількість і час кожного SQL-запиту.
+    """
+    from sqlalchemy import event
+
+    if not METRICS_ENABLED:
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# id(маршрут) -> повний шаблон шляху з префіксами include_router; маршрути після старту не змінюються
+_route_templates: Dict[int, str] = {}
+
+
+def _build_route_templates(app) -> Dict[int, str]:
+    from fastapi import routing
+
+    if hasattr(routing, "iter_route_contexts"):
+        # новіші FastAPI не копіюють маршрути при include_router: route.path — без префікса
+        return {id(ctx.original_route): ctx.path for ctx in routing.iter_route_contexts(app.routes)}
+    return {}
+
+
+def route_label(scope) -> str:
+    """
+    Шаблон маршруту (/api/contacts/{contact_id}), а не фактичний шлях —
+    щоб кількість міток була скінченною.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "<unmatched>"
+    if not _route_templates and scope.get("app") is not None:
+        _route_templates.update(_build_route_templates(scope["app"]))
+    return _route_templates.get(id(route)) or getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Чистий ASGI middleware: латентність і статус кожного HTTP-запиту та його SQL-навантаження.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = route_label(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_LATENCY.observe(elapsed, method, route)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route)
+            DB_TIME_PER_REQUEST.observe(stats.query_seconds, route)
+
+
+def _stat_families(prefix: str, values: dict, documentation: str, labels: Optional[dict] = None,
+                   counters: Iterable[str] = ()):
+    """
+    Числові значення словника статистики -> метрики prefix_<ключ>. Ключі з counters —
+    монотонні лічильники (counter із суфіксом _total), решта — поточні рівні (gauge).
+    """
+    families = []
+    for key, value in values.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        if key in counters:
+            name = f"{prefix}_{key}" if key.endswith("_total") else f"{prefix}_{key}_total"
+            families.append((name, "counter", f"{documentation}: {key}", [(labels or {}, value)]))
+        else:
+            families.append((f"{prefix}_{key}", "gauge", f"{documentation}: {key}", [(labels or {}, value)]))
+    return families
+
+
+# монотонні ключі словників статистики; решта — поточні рівні
+POOL_COUNTERS = ("wait_count", "wait_seconds_total", "timeouts")
+HASHING_COUNTERS = ("completed", "rejected", "wait_seconds_total", "run_seconds_total")
+CACHE_COUNTERS = ("hits", "misses", "errors")
+
+
+def _collect_runtime():
+    # імпорти тут, щоб metrics.py не тягнув за собою весь застосунок
+    from contacts_api.app import cache, database, hashing, jwt_utils, limiter_config, login_guard, mailer, storage
+
+    families = []
+    for name, engine in list(database._engines.items()):
+        families += _stat_families(
+            "db_pool", database.pool_stats(engine), "Connection pool", {"engine": name}, counters=POOL_COUNTERS
+        )
+    families += _stat_families(
+        "password_hash_pool", hashing.hashing_pool.stats(), "bcrypt thread pool", counters=HASHING_COUNTERS
+    )
+    for tier, values in cache.cache_stats().items():
+        families += _stat_families(f"cache_{tier}", values, f"Cache tier {tier}", counters=CACHE_COUNTERS)
+    families += _stat_families("token_cache", jwt_utils.token_cache_stats(), "Verified token cache",
+                               counters=CACHE_COUNTERS)
+    # у цих словниках лише лічильники подій
+    rate_limiter_stats = limiter_config.rate_limiter.stats
+    families += _stat_families("rate_limiter", rate_limiter_stats, "Rate limiter decisions", counters=rate_limiter_stats)
+    login_guard_stats = login_guard.login_guard_stats()
+    families += _stat_families("login_guard", login_guard_stats, "Login guard", counters=login_guard_stats)
+    storage_stats = storage.storage_stats()
+    families += _stat_families("avatar_storage", storage_stats, "Avatar storage", counters=storage_stats)
+    if mailer._mailer is not None:
+        families += _stat_families("mailer", mailer._mailer.stats, "SMTP mailer", counters=mailer._mailer.stats)
+    return families
+
+
+registry.register_collector(_collect_runtime)
+
+
+def render_metrics() -> str:
+    return registry.render()
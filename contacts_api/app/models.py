@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Boolean, DateTime
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy import text, cast, extract, inspect, update, Column, Integer, SmallInteger, String, ForeignKey, Date, Boolean, DateTime, Index
+from sqlalchemy.orm import relationship, validates
+from datetime import date, datetime
+from typing import Optional
 
 from contacts_api.app.db_base import Base
 
 
+def birthday_key(value: Optional[date]) -> Optional[int]:
+    """
+    Ключ місяць-день (MMDD, напр. 1231) для індексованого пошуку днів народження.
+    """
+    return value.month * 100 + value.day if value else None
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
@@ -14,10 +22,24 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     avatar_url = Column(String, nullable=True)
     role = Column(String, default="user")
+    # версія кешованого запису (cache.user_payload). onupdate додає version = version + 1
+    # до кожного UPDATE users, і ORM, і Core: інкремент атомарний, без перевірки старого
+    # значення, тож паралельні зміни не конфліктують. Core update(User) при цьому не чіпає
+    # кеш — після commit треба викликати cache.del_cached_user / write_through_user.
+    version = Column(Integer, nullable=False, default=1, onupdate=text("version + 1"))
+
+    # нову version після UPDATE повертає RETURNING, без окремого SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        # keyset pagination: WHERE user_id = ? AND id > ? ORDER BY id
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        # найближчі дні народження: WHERE user_id = ? AND birthday_key BETWEEN ? AND ?
+        Index("ix_contacts_user_id_birthday_key", "user_id", "birthday_key"),
+    )
 
     id = Column(Integer, primary_key=True)
     first_name = Column(String)
@@ -25,7 +47,36 @@ class Contact(Base):
     email = Column(String)
     phone = Column(String)
     birthday = Column(Date)
+    birthday_key = Column(SmallInteger, nullable=True)
     additional_info = Column(String, nullable=True)
 
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     user = relationship("User", backref="contacts")
+
+    @validates("birthday")
+    def _sync_birthday_key(self, key, value):
+        self.birthday_key = birthday_key(value)
+        return value
+
+
+def install_birthday_keys(connection) -> int:
+    """
+    Міграція для баз, створених до появи birthday_key (ідемпотентно): додати колонку
+    й індекс, якщо їх немає, і заповнити ключ для наявних контактів — інакше
+    get_upcoming_birthdays їх не бачить. Повертає кількість оновлених рядків.
+    """
+    table = Contact.__table__
+    if "birthday_key" not in {column["name"] for column in inspect(connection).get_columns(table.name)}:
+        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN birthday_key SMALLINT"))
+    for index in table.indexes:
+        if "birthday_key" in index.columns:
+            index.create(connection, checkfirst=True)
+
+    key = extract("month", Contact.birthday) * 100 + extract("day", Contact.birthday)
+    result = connection.execute(
+        update(Contact)
+        .where(Contact.birthday.is_not(None), Contact.birthday_key.is_(None))
+        .values(birthday_key=cast(key, SmallInteger))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,188 @@
+"""
+Надійна черга листів (outbox) на Redis Streams.
+
+API-воркер робить лише один XADD (enqueue_email); окремий процес
+(python -m contacts_api.outbox_worker) читає стрім через consumer group, відправляє
+листи через mailer і підтверджує (XACK) лише після доставки. Записи воркера, що впав,
+забирає інший через XAUTOCLAIM. Невдалі листи з attempts + 1 чекають у відкладеному
+наборі (ZSET із часом наступної спроби; затримка подвоюється від OUTBOX_RETRY_BASE_MS
+до OUTBOX_RETRY_MAX_MS), звідки воркер повертає їх у стрім, коли настає час. Після
+OUTBOX_MAX_ATTEMPTS (або постійної помилки) лист переїжджає у dead-letter стрім.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from redis.exceptions import ResponseError
+
+from contacts_api.app.cache import get_redis, register_script, script
+from contacts_api.app.email_utils import build_verification_message, build_password_reset_message
+from contacts_api.app.mailer import get_mailer, is_permanent
+from contacts_api.app.settings import get_settings
+
+settings = get_settings()
+
+OUTBOX_STREAM = f"{settings.env}:outbox:email"
+DEAD_LETTER_STREAM = f"{settings.env}:outbox:email:dead"
+DELAYED_SET = f"{settings.env}:outbox:email:delayed"
+OUTBOX_GROUP = "mailers"
+
+OUTBOX_CONCURRENCY = settings.outbox_concurrency
+OUTBOX_MAX_ATTEMPTS = settings.outbox_max_attempts
+# скільки запис може висіти непідтвердженим, перш ніж його забере інший воркер
+OUTBOX_CLAIM_IDLE_MS = settings.outbox_claim_idle_ms
+OUTBOX_BLOCK_MS = settings.outbox_block_ms
+OUTBOX_RETRY_BASE_MS = settings.outbox_retry_base_ms
+OUTBOX_RETRY_MAX_MS = settings.outbox_retry_max_ms
+
+BUILDERS = {
+    "verify": build_verification_message,
+    "reset": build_password_reset_message,
+}
+
+# Перенести в стрім відкладені записи, час яких настав (не більше ARGV[2] за раз).
+# KEYS: відкладений набір, стрім; ARGV: поточний час у мс, ліміт
+_PROMOTE_DUE = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+    local args = {}
+    for field, value in pairs(cjson.decode(member)) do
+        args[#args + 1] = field
+        args[#args + 1] = value
+    end
+    redis.call('XADD', KEYS[2], '*', unpack(args))
+    redis.call('ZREM', KEYS[1], member)
+end
+return #due
+"""
+
+register_script("outbox_promote_due", _PROMOTE_DUE)
+
+logger = logging.getLogger(__name__)
+
+
+async def enqueue_email(kind: str, email: str, token: str) -> str:
+    if kind not in BUILDERS:
+        raise ValueError(f"unknown email kind: {kind}")
+    return await get_redis().xadd(
+        OUTBOX_STREAM,
+        {"kind": kind, "to": email, "token": token, "attempts": 0, "enqueued_at": int(time.time())},
+    )
+
+
+class OutboxConsumer:
+    def __init__(
+        self,
+        name: str,
+        mailer=None,
+        concurrency: int = OUTBOX_CONCURRENCY,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        claim_idle_ms: int = OUTBOX_CLAIM_IDLE_MS,
+        block_ms: int = OUTBOX_BLOCK_MS,
+        retry_base_ms: int = OUTBOX_RETRY_BASE_MS,
+        retry_max_ms: int = OUTBOX_RETRY_MAX_MS,
+    ):
+        self.name = name
+        self.mailer = mailer or get_mailer()
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.claim_idle_ms = claim_idle_ms
+        self.block_ms = block_ms
+        self.retry_base_ms = retry_base_ms
+        self.retry_max_ms = retry_max_ms
+        self.stats = {"sent": 0, "retried": 0, "dead": 0, "claimed": 0}
+
+    async def ensure_group(self):
+        try:
+            await get_redis().xgroup_create(OUTBOX_STREAM, OUTBOX_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run_once(self) -> int:
+        """
+        Обробити одну порцію (не більше concurrency записів). Повертає кількість записів.
+        """
+        r = get_redis()
+        await script("outbox_promote_due")(
+            keys=[DELAYED_SET, OUTBOX_STREAM], args=[int(time.time() * 1000), self.concurrency * 10]
+        )
+        _, claimed, *_ = await r.xautoclaim(
+            OUTBOX_STREAM, OUTBOX_GROUP, self.name,
+            min_idle_time=self.claim_idle_ms, start_id="0-0", count=self.concurrency,
+        )
+        entries = [(entry_id, fields) for entry_id, fields in claimed if fields]
+        self.stats["claimed"] += len(entries)
+
+        if len(entries) < self.concurrency:
+            response = await r.xreadgroup(
+                OUTBOX_GROUP, self.name, {OUTBOX_STREAM: ">"},
+                count=self.concurrency - len(entries),
+                block=None if entries else self.block_ms,
+            )
+            for _, items in response or []:
+                entries.extend(items)
+
+        await asyncio.gather(*(self._handle(entry_id, fields) for entry_id, fields in entries))
+        return len(entries)
+
+    async def run(self):
+        await self.ensure_group()
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("outbox consumer failed, retrying", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _handle(self, entry_id: str, fields: dict):
+        try:
+            message = BUILDERS[fields["kind"]](fields["to"], fields["token"])
+            await self.mailer.send(message)
+        except Exception as e:
+            await self._reschedule(entry_id, fields, e)
+            return
+
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, entry_id)
+            pipe.xdel(OUTBOX_STREAM, entry_id)
+            await pipe.execute()
+        self.stats["sent"] += 1
+
+    def retry_delay_ms(self, attempts: int) -> int:
+        return min(self.retry_max_ms, self.retry_base_ms * 2 ** (attempts - 1))
+
+    async def _reschedule(self, entry_id: str, fields: dict, error: Exception):
+        attempts = int(fields.get("attempts", 0)) + 1
+        dead = attempts >= self.max_attempts or is_permanent(error) or fields.get("kind") not in BUILDERS
+        retry = {**fields, "attempts": str(attempts), "error": str(error)[:500]}
+
+        # нова копія і підтвердження старої — атомарно, щоб лист не загубився і не задвоївся
+        async with get_redis().pipeline(transaction=True) as pipe:
+            if dead:
+                pipe.xadd(DEAD_LETTER_STREAM, retry)
+            else:
+                # id запису робить елемент набору унікальним навіть для однакових листів
+                due_ms = int(time.time() * 1000) + self.retry_delay_ms(attempts)
+                pipe.zadd(DELAYED_SET, {json.dumps({**retry, "retry_of": entry_id}): due_ms})
+            pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, entry_id)
+            pipe.xdel(OUTBOX_STREAM, entry_id)
+            await pipe.execute()
+
+        if dead:
+            self.stats["dead"] += 1
+            logger.error("email %s to %s moved to dead letters: %s", entry_id, fields.get("to"), error)
+        else:
+            self.stats["retried"] += 1
+
+
+async def outbox_stats() -> dict:
+    r = get_redis()
+    return {
+        "pending": await r.xlen(OUTBOX_STREAM),
+        "delayed": await r.zcard(DELAYED_SET),
+        "dead": await r.xlen(DEAD_LETTER_STREAM),
+    }
@@ -0,0 +1,33 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(**values) -> str:
+    """
+    Запакувати позицію сторінки в непрозорий рядок для клієнта.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, **fields: type) -> dict:
+    """
+    Розпакувати курсор і перевірити типи очікуваних полів (400, якщо курсор зіпсований).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        values = None
+
+    if not isinstance(values, dict) or any(
+        not isinstance(values.get(name), kind) or isinstance(values.get(name), bool)
+        for name, kind in fields.items()
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
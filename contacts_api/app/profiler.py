@@ -0,0 +1,244 @@
+"""
+Профайлер SQL на рівні HTTP-запиту (для dev/staging, SQL_PROFILER_ENABLED=true).
+
+Кожен виконаний оператор записується в профіль поточного запиту (contextvar).
+Після відповіді профіль перевіряється:
+  - однаковий текст SQL SQL_PROFILER_REPEAT_THRESHOLD і більше разів — ознака N+1;
+  - операторів більше за SQL_PROFILER_BUDGET — запит перевищив бюджет;
+  - оператори, довші за SQL_SLOW_QUERY_MS, логуються разом із планом EXPLAIN.
+
+Підсумок віддається в заголовках X-SQL-* кожної відповіді, повний звіт —
+у GET /debug/sql-profile (останні SQL_PROFILER_HISTORY запитів).
+"""
+import logging
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from itertools import count
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from contacts_api.app.settings import get_settings
+
+settings = get_settings()
+
+SQL_PROFILER_ENABLED = settings.sql_profiler_enabled
+SQL_PROFILER_BUDGET = settings.sql_profiler_budget
+SQL_PROFILER_REPEAT_THRESHOLD = settings.sql_profiler_repeat_threshold
+SQL_SLOW_QUERY_MS = settings.sql_slow_query_ms
+SQL_PROFILER_HISTORY = settings.sql_profiler_history
+
+QUERIES_HEADER = "X-SQL-Queries"
+TIME_HEADER = "X-SQL-Time-Ms"
+REPEATED_HEADER = "X-SQL-Repeated"
+REPORT_HEADER = "X-SQL-Profile"
+PROFILER_HEADERS = [QUERIES_HEADER, TIME_HEADER, REPEATED_HEADER, REPORT_HEADER] if SQL_PROFILER_ENABLED else []
+
+logger = logging.getLogger(__name__)
+
+_ids = count(1)
+_reports: deque = deque(maxlen=SQL_PROFILER_HISTORY)
+
+
+class RequestProfile:
+    __slots__ = ("id", "method", "path", "started", "statements", "slow")
+
+    def __init__(self, method: str, path: str):
+        self.id = next(_ids)
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        # [(SQL, мс), ...] у порядку виконання
+        self.statements: List[tuple] = []
+        self.slow: List[dict] = []
+
+    @property
+    def sql_ms(self) -> float:
+        return sum(ms for _, ms in self.statements)
+
+    def repeated(self) -> List[dict]:
+        counts = Counter(statement for statement, _ in self.statements)
+        return [
+            {"statement": statement, "count": n}
+            for statement, n in counts.most_common()
+            if n >= SQL_PROFILER_REPEAT_THRESHOLD
+        ]
+
+    def report(self, status_code: Optional[int] = None) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status_code,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "queries": len(self.statements),
+            "sql_ms": round(self.sql_ms, 3),
+            "budget": SQL_PROFILER_BUDGET,
+            "over_budget": len(self.statements) > SQL_PROFILER_BUDGET,
+            "repeated": self.repeated(),
+            "slow": self.slow,
+            "statements": [{"statement": statement, "ms": round(ms, 3)} for statement, ms in self.statements],
+        }
+
+
+# профіль поточного HTTP-запиту (None поза запитом)
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+EXPLAIN_PREFIXES = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+# лише для цих операторів EXPLAIN має сенс (SHOW, SET, DDL тощо він не приймає)
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+_SAVEPOINT = "sql_profiler_explain"
+
+
+def _explain(conn, context, statement: str, parameters) -> Optional[str]:
+    """
+    План оператора на окремому DBAPI-курсорі того ж з'єднання (без ANALYZE — нічого не виконує повторно).
+
+    На PostgreSQL помилка в транзакції обриває всю транзакцію, тому EXPLAIN
+    виконується всередині SAVEPOINT і при невдачі відкочується лише він.
+    """
+    if context.executemany or context._is_server_side:
+        return None
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    words = statement.lstrip().split(None, 1)
+    if prefix is None or not words or words[0].upper() not in EXPLAINABLE:
+        return None
+    guarded = conn.dialect.name == "postgresql"
+    cursor = conn.connection.cursor()
+    try:
+        if guarded:
+            cursor.execute(f"SAVEPOINT {_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+        except Exception as e:
+            if guarded:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+            plan = f"EXPLAIN failed: {e}"
+        if guarded:
+            cursor.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+        return plan
+    except Exception as e:
+        # SAVEPOINT неможливий (напр. з'єднання в autocommit) — обходимось без плану
+        logger.debug("EXPLAIN skipped", exc_info=True)
+        return f"EXPLAIN skipped: {e}"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None:
+        return
+    ms = (time.perf_counter() - context._profiler_started) * 1000
+    profile.statements.append((statement, ms))
+    if ms >= SQL_SLOW_QUERY_MS:
+        plan = _explain(conn, context, statement, parameters)
+        profile.slow.append({"statement": statement, "ms": round(ms, 3), "plan": plan})
+        logger.warning("slow query (%.1f ms) in %s %s: %s\n%s", ms, profile.method, profile.path, statement, plan)
+
+
+def instrument_engine(sync_engine):
+    if not SQL_PROFILER_ENABLED:
+        return
+    from sqlalchemy import event
+
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _finish(profile: RequestProfile, status_code: Optional[int]) -> dict:
+    report = profile.report(status_code)
+    _reports.append(report)
+    if report["over_budget"]:
+        logger.warning(
+            "%s %s issued %d SQL statements (budget %d)",
+            profile.method, profile.path, report["queries"], SQL_PROFILER_BUDGET,
+        )
+    for item in report["repeated"]:
+        logger.warning(
+            "possible N+1 in %s %s: statement repeated %d times: %s",
+            profile.method, profile.path, item["count"], item["statement"],
+        )
+    return report
+
+
+class SQLProfilerMiddleware:
+    """
+    ASGI middleware: відкриває профіль на запит і дописує заголовки X-SQL-* у відповідь.
+
+    Заголовки відображають оператори, виконані до початку відповіді; звіт
+    у /debug/sql-profile враховує й ті, що виконались після (фонові задачі, закриття сесії).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_PROFILER_ENABLED or scope["path"].startswith("/debug/sql-profile"):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers += [
+                    (QUERIES_HEADER.lower().encode(), str(len(profile.statements)).encode()),
+                    (TIME_HEADER.lower().encode(), f"{profile.sql_ms:.3f}".encode()),
+                    (REPEATED_HEADER.lower().encode(), str(len(profile.repeated())).encode()),
+                    (REPORT_HEADER.lower().encode(), str(profile.id).encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            _finish(profile, status_code)
+
+
+def clear_reports():
+    _reports.clear()
+
+
+def _require_enabled():
+    # поза dev/staging звітів немає, і маршрут поводиться як неіснуючий
+    if not SQL_PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+router = APIRouter(
+    prefix="/debug/sql-profile", tags=["debug"], include_in_schema=False, dependencies=[Depends(_require_enabled)]
+)
+
+
+@router.get("")
+async def list_profiles(problems_only: bool = False) -> List[Dict]:
+    """
+    Останні профілі, від найновішого; problems_only — лише з N+1, перевищенням бюджету чи повільними запитами.
+    """
+    reports = reversed(_reports)
+    if problems_only:
+        reports = (r for r in reports if r["over_budget"] or r["repeated"] or r["slow"])
+    return list(reports)
+
+
+@router.get("/{report_id}")
+async def get_profile(report_id: int) -> Dict:
+    for report in _reports:
+        if report["id"] == report_id:
+            return report
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
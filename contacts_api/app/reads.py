@@ -0,0 +1,75 @@
+"""
+Легкий шлях читання для списків контактів.
+
+Списки (GET /api/contacts, пошук, дні народження) вибирають лише потрібні колонки
+Core-запитом — без ORM-об'єктів та identity map — і серіалізують рядки напряму,
+без повторної перевірки Pydantic: дані з БД вже пройшли ContactCreate/ContactUpdate.
+Якщо встановлено orjson, JSON кодує він; інакше — стандартний json.
+Формат відповіді той самий, що дає ContactOut.
+"""
+import json
+from datetime import date
+from typing import Iterable, Optional
+
+from contacts_api.app.models import Contact
+
+try:
+    import orjson
+except ImportError:  # необов'язкова залежність
+    orjson = None
+
+# порядок колонок = порядок аргументів ContactRow
+CONTACT_COLUMNS = (
+    Contact.id,
+    Contact.first_name,
+    Contact.last_name,
+    Contact.email,
+    Contact.phone,
+    Contact.birthday,
+    Contact.additional_info,
+)
+
+
+class ContactRow:
+    __slots__ = ("id", "first_name", "last_name", "email", "phone", "birthday", "additional_info")
+
+    def __init__(self, id: int, first_name: str, last_name: str, email: str,
+                 phone: Optional[str], birthday: Optional[date], additional_info: Optional[str]):
+        self.id = id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.email = email
+        self.phone = phone
+        self.birthday = birthday
+        self.additional_info = additional_info
+
+    def as_dict(self) -> dict:
+        # ключі в тому ж порядку, що й у ContactOut
+        return {
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "email": self.email,
+            "phone": self.phone,
+            "birthday": self.birthday,
+            "additional_info": self.additional_info,
+            "id": self.id,
+        }
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def contacts_json(rows: Iterable[tuple]) -> str:
+    """
+    Рядки CONTACT_COLUMNS -> JSON-масив контактів.
+    """
+    return dumps([ContactRow(*row).as_dict() for row in rows])
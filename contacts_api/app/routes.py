@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal, Optional
 
-from contacts_api.app import crud
+from contacts_api.app import crud, batch, bulk_import, bulk_export, cache, reads
 from contacts_api.app.database import get_db
-from contacts_api.app.schemas import ContactCreate, ContactUpdate, ContactOut
+from contacts_api.app.schemas import ContactCreate, ContactUpdate, ContactOut, BatchRequest, BatchResponse
 from contacts_api.app.dependencies import get_current_user
+from contacts_api.app.limiter_config import rate_limit
 from contacts_api.app.models import User
+from contacts_api.app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/api/contacts", tags=["Contacts"])
 
 
+def _json_response(body: str, next_cursor: str = "") -> Response:
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.post("", response_model=ContactOut, status_code=status.HTTP_201_CREATED)
 @router.post("/", response_model=ContactOut, status_code=status.HTTP_201_CREATED)
@@ -21,22 +29,106 @@ async def create_contact(
 ):
     return await crud.create_contact(contact, db, current_user)
 
+@router.post("/batch", response_model=BatchResponse)
+async def batch_contacts(
+    body: BatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Кілька create/update/delete за один запит і одну транзакцію.
+    Результат кожної операції — у results[i] зі своїм status (201/200/204/404/409/422).
+    """
+    return {"results": await batch.apply_batch(body.operations, db, current_user)}
+
+
+@router.post("/import")
+async def import_contacts(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Масовий імпорт: тіло в NDJSON (application/x-ndjson) або CSV (text/csv, перший рядок — заголовок).
+    Відповідь — NDJSON з помилками по рядках і підсумковим рядком {"imported", "failed"};
+    її надсилаємо лише після обробки всього тіла (звіт накопичується в тимчасовому файлі).
+    """
+    content_type = (request.headers.get("content-type") or "").lower()
+    if "csv" in content_type:
+        parse = bulk_import.iter_csv_rows
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        parse = bulk_import.iter_ndjson_rows
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Use application/x-ndjson or text/csv",
+        )
+
+    report = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    try:
+        rows = parse(bulk_import.iter_lines(request.stream()))
+        await bulk_import.import_contacts(rows, db, current_user, report)
+    except BaseException:
+        report.close()
+        raise
+    return StreamingResponse(bulk_import.iter_report(report), media_type="application/x-ndjson")
+
+
 @router.get("", response_model=List[ContactOut])
 @router.get("/", response_model=List[ContactOut])
 async def get_contacts(
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return await crud.get_contacts(skip, limit, db, current_user)
+    """
+    Сторінка контактів. Наступну сторінку можна взяти за курсором із заголовка X-Next-Cursor
+    (тоді skip ігнорується і вартість запиту не залежить від глибини).
+    """
+    part = f"list:{skip}:{limit}:{cursor or ''}"
+    generation, cached = await cache.get_cached_contacts(current_user.id, part)
+    if cached is not None:
+        # формат запису: "<next_cursor>\n<json>"
+        next_cursor, _, body = cached.partition("\n")
+        return _json_response(body, next_cursor)
+
+    after_id = decode_cursor(cursor, id=int)["id"] if cursor else None
+    rows = await crud.get_contacts(
+        skip, limit, db, current_user, after_id=after_id, columns=reads.CONTACT_COLUMNS
+    )
+    next_cursor = ""
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(id=rows[-1].id)
+
+    body = reads.contacts_json(rows)
+    await cache.set_cached_contacts(current_user.id, generation, part, f"{next_cursor}\n{body}")
+    return _json_response(body, next_cursor)
 
 @router.get("/birthdays", response_model=List[ContactOut])
 async def upcoming_birthdays(
+    days: int = Query(7, ge=0, le=366),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return await crud.get_upcoming_birthdays(db, current_user)
+    rows = await crud.get_upcoming_birthdays(db, current_user, days=days, columns=reads.CONTACT_COLUMNS)
+    return _json_response(reads.contacts_json(rows))
+
+@router.get("/export")
+async def export_contacts(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Вивантажити всі контакти користувача одним потоковим (chunked) відповіддю.
+    """
+    return StreamingResponse(
+        bulk_export.stream_contacts(db, current_user, format),
+        media_type=bulk_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
 
 @router.get("/{contact_id}", response_model=ContactOut)
 async def get_contact_by_id(
@@ -44,10 +136,18 @@ async def get_contact_by_id(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    part = f"item:{contact_id}"
+    generation, cached = await cache.get_cached_contacts(current_user.id, part)
+    if cached is not None:
+        return _json_response(cached)
+
     contact = await crud.get_contact(contact_id, db, current_user)
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
-    return contact
+
+    body = ContactOut.model_validate(contact).model_dump_json()
+    await cache.set_cached_contacts(current_user.id, generation, part, body)
+    return _json_response(body)
 
 
 @router.put("/{contact_id}", response_model=ContactOut)
@@ -74,13 +174,27 @@ async def delete_contact(
         raise HTTPException(status_code=404, detail="Contact not found")
 
 
-@router.get("/search/", response_model=List[ContactOut])
+@router.get("/search/", response_model=List[ContactOut], dependencies=[Depends(rate_limit("search", "60/minute"))])
 async def search_contacts(
     query: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return await crud.search_contacts(query, db, current_user)
-
-
-
+    """
+    Пошук за ім'ям, прізвищем або email; найрелевантніші контакти першими.
+    """
+    after = None
+    if cursor:
+        position = decode_cursor(cursor, rank=int, id=int)
+        after = (position["rank"], position["id"])
+
+    hits = await crud.search_contacts(
+        query, db, current_user, limit=limit, after=after, columns=reads.CONTACT_COLUMNS
+    )
+    next_cursor = ""
+    if hits and len(hits) == limit:
+        last, rank = hits[-1]
+        next_cursor = encode_cursor(rank=rank, id=last[0])
+    return _json_response(reads.contacts_json(row for row, _ in hits), next_cursor)
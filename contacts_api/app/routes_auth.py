@@ -1,47 +1,50 @@
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, Request, File, UploadFile
+import logging
+
+from fastapi import APIRouter, HTTPException, status, Depends, Request, BackgroundTasks
 from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi.responses import JSONResponse
 
-from contacts_api.app.cache import set_cached_user
-from contacts_api.app.cloudinary_utils import upload_avatar
+from contacts_api.app.cache import write_through_user
+from contacts_api.app import avatars
 
 from contacts_api.app.database import get_db
 from contacts_api.app.models import User
 from contacts_api.app.schemas import UserCreate, UserResponse, Token
 from pydantic import EmailStr, BaseModel
 from fastapi import Body
-from contacts_api.app.auth import hash_password, verify_password
+from contacts_api.app.hashing import hashing_pool, HashingPoolSaturated
 from contacts_api.app.jwt_utils import (
     create_access_token,
     create_email_token,
     decode_email_token
 )
-from contacts_api.app.email_utils import send_verification_email, send_password_reset_email
+from contacts_api.app.outbox import enqueue_email
 from contacts_api.app.dependencies import get_current_user, admin_required
 
-from slowapi.errors import RateLimitExceeded
-from contacts_api.app.limiter_config import limiter
+from contacts_api.app.limiter_config import rate_limit, client_ip
+from contacts_api.app.login_guard import LoginAttempt, forget_account
 
 router = APIRouter(tags=["Authentication"])
+logger = logging.getLogger(__name__)
 
 
 class SignupResponse(BaseModel):
     user: UserResponse
 
 
-def ratelimit_handler(request: Request, exc: RateLimitExceeded):
+def hashing_busy_handler(request: Request, exc: HashingPoolSaturated):
     return JSONResponse(
-        status_code=429,
-        content={"detail": "Rate limit exceeded"}
+        status_code=503,
+        content={"detail": "Server is busy, try again shortly"},
+        headers={"Retry-After": "1"},
     )
 
 
 @router.post("/signup", response_model=SignupResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: UserCreate,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(select(User).where(User.email == user_data.email))
@@ -54,14 +57,20 @@ async def register_user(
 
     new_user = User(
         email=user_data.email,
-        hashed_password=hash_password(user_data.password)
+        hashed_password=await hashing_pool.hash(user_data.password)
     )
     db.add(new_user)
     await db.commit()
     await db.refresh(new_user)
 
+    await forget_account(new_user.email)
     token = create_email_token(new_user.email)
-    background_tasks.add_task(send_verification_email, new_user.email, token)
+    try:
+        await enqueue_email("verify", new_user.email, token)
+    except Exception:
+        # користувач уже збережений: 500 тут означав би 409 на повторі й акаунт без листа.
+        # Лист можна запросити знову через /request-verification
+        logger.warning("verification email for user %s not queued", new_user.id, exc_info=True)
 
     return {"user": new_user}
 
@@ -79,14 +88,20 @@ async def login_user(request: Request, db: AsyncSession = Depends(get_db)):
         email = form.get("email") or form.get("username")
         password = form.get("password")
 
-    if not email or not password:
+    # у JSON це можуть бути числа чи об'єкти, у формі — файли
+    if not isinstance(email, str) or not isinstance(password, str) or not email or not password:
         raise HTTPException(status_code=422, detail="Email and password are required")
 
+    # блокування і відомо хибні пари відсікаються ще до запиту в БД і bcrypt
+    attempt = LoginAttempt(email, password, client_ip(request))
+    await attempt.check()
+
     stmt = select(User).where(User.email == email)
     user = await db.scalar(stmt)
 
-    if not user or not verify_password(password, user.hashed_password):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if not user or not await hashing_pool.verify(password, user.hashed_password):
+        await attempt.failed()
+    await attempt.succeeded()
 
     # IMPORTANT: do NOT auto-verify here, do NOT auto-create user here
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -103,6 +118,7 @@ async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
 
     user.is_verified = True
     await db.commit()
+    await write_through_user(user)
     return {"message": "Email verified successfully!"}
 
 
@@ -113,7 +129,7 @@ async def create_user(user_in, db):
 
     u = User(
         email=user_in.email,
-        hashed_password=hash_password(user_in.password),
+        hashed_password=await hashing_pool.hash(user_in.password),
         is_verified=False,
         role="user",
     )
@@ -123,37 +139,79 @@ async def create_user(user_in, db):
     return u
 
 
-@router.get("/me", response_model=UserResponse)
-@limiter.limit("5/minute")
+@router.get("/me", response_model=UserResponse, dependencies=[Depends(rate_limit("me", "5/minute"))])
 async def get_my_profile(request: Request, current_user: User = Depends(get_current_user)):
     if not current_user.is_verified:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email not verified")
     return current_user
 
 
-@router.post("/avatar", response_model=UserResponse)
+AVATAR_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/avatar", response_model=UserResponse, openapi_extra=AVATAR_UPLOAD_BODY)
 async def update_avatar(
     request: Request,
-    file: UploadFile = File(...),
+    background_tasks: BackgroundTasks,
+    background: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(admin_required)
 ):
+    """
+    Тіло читається потоково (див. avatars.receive_avatar). З ?background=true відповідь 202
+    з job_id повертається одразу, а стан можна дізнатись через GET /avatar/jobs/{job_id}.
+    """
     if not current_user.is_verified:
         raise HTTPException(status_code=403, detail="Email not verified")
 
-    content = await file.read()
-    url = upload_avatar(content, public_id=str(current_user.id))
+    upload = await avatars.receive_avatar(request)
 
-    current_user.avatar_url = url
-    await db.commit()
-    await db.refresh(current_user)
+    if background:
+        job_id = await avatars.create_job(current_user.id)
+        background_tasks.add_task(avatars.run_job, job_id, upload, current_user.id)
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "pending"})
 
-    return current_user
+    try:
+        return await avatars.store_avatar(upload, current_user.id, db)
+    finally:
+        upload.close()
+
+
+@router.get("/avatar/jobs/{job_id}")
+async def avatar_job_status(job_id: str, current_user: User = Depends(get_current_user)):
+    return await avatars.get_job(job_id, current_user.id)
+
+
+@router.post("/request-verification", dependencies=[Depends(rate_limit("request_verification", "5/minute"))])
+async def request_verification(
+    email: EmailStr,
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
+
+    if user and not user.is_verified:
+        token = create_email_token(user.email)
+        await enqueue_email("verify", user.email, token)
+
+    return {"message": "If the email is registered and not verified, a verification email will be sent."}
 
 
 @router.post("/request-password-reset")
 async def request_password_reset(
-    background_tasks: BackgroundTasks,
     email: EmailStr,
     db: AsyncSession = Depends(get_db)
 ):
@@ -162,7 +220,7 @@ async def request_password_reset(
 
     if user:
         token = create_email_token(user.email)
-        background_tasks.add_task(send_password_reset_email, user.email, token)
+        await enqueue_email("reset", user.email, token)
 
     return {"message": "If the email is registered, reset instructions will be sent."}
 
@@ -184,8 +242,10 @@ async def reset_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.hashed_password = hash_password(new_password)
+    user.hashed_password = await hashing_pool.hash(new_password)
     await db.commit()
+    await write_through_user(user)
+    await forget_account(user.email)
 
     return {"message": "Password reset successfully."}
 
@@ -204,6 +264,6 @@ async def make_user_admin(
 
     user.role = "admin"
     await db.commit()
-    await db.refresh(user)
+    await write_through_user(user)
 
     return {"message": f"User {user.email} promoted to admin"}
@@ -1,7 +1,9 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import date
 
+from contacts_api.app.settings import get_settings
+
 class ContactBase(BaseModel):
     first_name: str = Field(..., max_length=50)
     last_name: str = Field(..., max_length=50)
@@ -26,6 +28,26 @@ class ContactOut(ContactBase):
     class Config:
         from_attributes = True
 
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    # перевіряється окремо для кожної операції (ContactCreate / ContactUpdate)
+    data: Optional[Dict[str, Any]] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=get_settings().batch_max_operations)
+
+class BatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[int] = None
+    contact: Optional[ContactOut] = None
+    errors: Optional[List[Dict[str, Any]]] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+
 class UserCreate(BaseModel):
     email: EmailStr
     password: str = Field(min_length=6)
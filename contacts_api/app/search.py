@@ -0,0 +1,179 @@
+"""
+Пошук контактів.
+
+На PostgreSQL з розширенням pg_trgm запит обслуговують GIN-індекси триграм
+(ILIKE '%q%' по них не потребує seq scan), а результати ранжуються функцією
+similarity(). На інших діалектах (SQLite, Postgres без pg_trgm) працює
+внутрішньопроцесний рушій з тією ж метрикою схожості; він ранжує не більше
+SEARCH_MAX_CANDIDATES збігів (з найменшими id), щоб сторінка не коштувала O(усіх збігів).
+
+Ранг — ціле число (схожість * RANK_SCALE, округлена): курсор (ранг, id) порівнюється
+точно, без похибки float, що пройшов через текст.
+"""
+import heapq
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Integer, cast, event, func, or_, and_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from contacts_api.app.models import Contact, User
+from contacts_api.app.settings import get_settings
+
+SEARCH_MAX_CANDIDATES = get_settings().search_max_candidates
+RANK_SCALE = 1_000_000
+
+SEARCH_COLUMNS = (Contact.first_name, Contact.last_name, Contact.email)
+
+TRIGRAM_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS ix_contacts_{column.key}_trgm "
+    f"ON contacts USING gin ({column.key} gin_trgm_ops)"
+    for column in SEARCH_COLUMNS
+]
+
+# (контакт або рядок Core з columns, ранг)
+Hit = Tuple[Contact, int]
+
+# url рушія -> чи встановлено pg_trgm
+_trigram_support: dict = {}
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def install_search_indexes(connection) -> bool:
+    """
+    Міграція: увімкнути pg_trgm і створити триграмні індекси (ідемпотентно).
+    Повертає False, якщо діалект або сервер їх не підтримує.
+    """
+    if connection.dialect.name != "postgresql":
+        return False
+    available = connection.execute(
+        text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if not available:
+        return False
+
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for ddl in TRIGRAM_INDEXES:
+        connection.execute(text(ddl))
+    _trigram_support[str(connection.engine.url)] = True
+    return True
+
+
+@event.listens_for(Contact.__table__, "after_create")
+def _create_search_indexes(target, connection, **kw):
+    install_search_indexes(connection)
+
+
+def trigrams(value: Optional[str]) -> set:
+    """
+    Набір триграм рядка так само, як їх будує pg_trgm: слова в нижньому регістрі
+    з двома пробілами спереду і одним ззаду.
+    """
+    grams = set()
+    for word in _WORD_RE.findall((value or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: Optional[str], b: Optional[str]) -> float:
+    """
+    Аналог pg_trgm similarity(): частка спільних триграм.
+    """
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def quantize_rank(score: float) -> int:
+    return round(score * RANK_SCALE)
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _match(query: str):
+    pattern = _like_pattern(query)
+    return or_(*(column.ilike(pattern, escape="\\") for column in SEARCH_COLUMNS))
+
+
+async def _has_trigram(db: AsyncSession) -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    key = str(bind.url)
+    if key not in _trigram_support:
+        found = await db.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        _trigram_support[key] = bool(found)
+    return _trigram_support[key]
+
+
+async def _search_trigram(
+    query: str, limit: int, db: AsyncSession, user: User, after: Optional[Tuple[int, int]],
+    columns: Optional[tuple],
+) -> List[Hit]:
+    score = func.greatest(*(func.similarity(column, query) for column in SEARCH_COLUMNS))
+    rank = cast(func.round(score * RANK_SCALE), Integer)
+    stmt = select(*(columns or (Contact,)), rank.label("rank")).where(Contact.user_id == user.id, _match(query))
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(or_(rank < after_rank, and_(rank == after_rank, Contact.id > after_id)))
+
+    result = await db.execute(stmt.order_by(rank.desc(), Contact.id).limit(limit))
+    if columns:
+        return [(row[:-1], row[-1]) for row in result.all()]
+    return [(contact, r) for contact, r in result.all()]
+
+
+async def _search_in_process(
+    query: str, limit: int, db: AsyncSession, user: User, after: Optional[Tuple[int, int]],
+    columns: Optional[tuple],
+) -> List[Hit]:
+    # Тягнемо лише id і текстові поля кандидатів (не більше SEARCH_MAX_CANDIDATES),
+    # ранжуємо в Python, і тільки потрібну сторінку завантажуємо як ORM-об'єкти.
+    result = await db.execute(
+        select(Contact.id, *SEARCH_COLUMNS)
+        .where(Contact.user_id == user.id, _match(query))
+        .order_by(Contact.id)
+        .limit(SEARCH_MAX_CANDIDATES)
+    )
+    scored = (
+        (quantize_rank(max(similarity(value, query) for value in values)), contact_id)
+        for contact_id, *values in result.all()
+    )
+    if after is not None:
+        after_rank, after_id = after
+        scored = (
+            (r, cid) for r, cid in scored
+            if r < after_rank or (r == after_rank and cid > after_id)
+        )
+    page = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+    if not page:
+        return []
+
+    contacts = await db.execute(
+        select(*(columns or (Contact,))).where(Contact.id.in_([cid for _, cid in page]))
+    )
+    by_id = {contact.id: contact for contact in (contacts.all() if columns else contacts.scalars())}
+    return [(by_id[cid], r) for r, cid in page]
+
+
+async def search_contacts(
+    query: str, limit: int, db: AsyncSession, user: User, after: Optional[Tuple[int, int]] = None,
+    columns: Optional[tuple] = None,
+) -> List[Hit]:
+    """
+    Знайти контакти користувача за ім'ям, прізвищем або email.
+
+    Повертає пари (контакт, цілий ранг), відсортовані за спаданням рангу, а далі за id;
+    after = (ранг, id) останнього елемента попередньої сторінки; з columns замість
+    контактів повертаються рядки Core (перша колонка має бути Contact.id).
+    """
+    if await _has_trigram(db):
+        return await _search_trigram(query, limit, db, user, after, columns)
+    return await _search_in_process(query, limit, db, user, after, columns)
@@ -0,0 +1,216 @@
+"""
+Єдине місце, де читаються змінні оточення (і .env).
+
+Модулі беруть значення з get_settings(); важкі ресурси (рушій БД, клієнт Redis,
+конфігурація Cloudinary, SMTP) створюються ліниво при першому використанні,
+тому імпорт застосунку не має побічних ефектів.
+"""
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _ints(name: str, default: tuple) -> tuple:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return tuple(int(part) for part in value.split(",") if part.strip())
+
+
+def _mapping(name: str) -> dict:
+    # "a=1,b=2" -> {"a": "1", "b": "2"}
+    pairs = (item.split("=", 1) for item in os.getenv(name, "").split(",") if "=" in item)
+    return {key.strip(): value.strip() for key, value in pairs}
+
+
+def _bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    env: str = "test"
+    secret_key: Optional[str] = None
+    redis_url: str = "redis://localhost:6379/0"
+
+    # database.py
+    database_url: Optional[str] = None
+    test_database_url: Optional[str] = None
+    db_echo: str = "false"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+
+    # hashing.py
+    hash_pool_workers: int = 2
+    hash_pool_max_queue: int = 64
+
+    # cache.py / jwt_utils.py
+    local_user_cache_size: int = 10_000
+    local_user_cache_ttl: float = 5
+    user_cache_ttl: int = 6 * 3600
+    contact_cache_enabled: bool = True
+    contact_cache_ttl: int = 60
+    contact_cache_max_bytes: int = 256 * 1024
+    token_cache_size: int = 10_000
+
+    # search.py
+    search_max_candidates: int = 2000
+
+    # bulk_import.py / bulk_export.py / batch.py
+    import_batch_size: int = 1000
+    import_max_line_bytes: int = 64 * 1024
+    export_chunk_size: int = 1000
+    batch_max_operations: int = 500
+
+    # limiter_config.py
+    rate_limit_enabled: bool = True
+    rate_limits: dict = field(default_factory=dict)
+    rate_limit_lease_size: int = 20
+    rate_limit_lease_ttl: float = 1.0
+    rate_limit_trust_forwarded: bool = False
+
+    # login_guard.py
+    login_failure_window: int = 900
+    login_account_free_attempts: int = 5
+    login_ip_free_attempts: int = 50
+    login_lockout_base: float = 1.0
+    login_lockout_max: int = 900
+    login_bad_pair_ttl: int = 300
+
+    # avatars.py / cloudinary_utils.py
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_job_ttl: int = 3600
+    avatar_storage: str = "cloudinary"
+    avatar_local_root: str = "media"
+    avatar_local_url: str = "/media"
+    avatar_sizes: tuple = (64, 128, 256)
+    cloudinary_name: Optional[str] = None
+    cloudinary_api_key: Optional[str] = None
+    cloudinary_api_secret: Optional[str] = None
+
+    # email_utils.py / mailer.py
+    smtp_user: Optional[str] = None
+    smtp_password: Optional[str] = None
+    smtp_host: str = "smtp.gmail.com"
+    smtp_port: int = 587
+    smtp_starttls: bool = True
+    smtp_pool_size: int = 2
+    smtp_batch_size: int = 20
+    smtp_max_retries: int = 3
+    smtp_retry_backoff: float = 1.0
+    smtp_timeout: float = 10.0
+
+    # outbox.py
+    outbox_concurrency: int = 10
+    outbox_max_attempts: int = 5
+    outbox_claim_idle_ms: int = 60_000
+    outbox_block_ms: int = 5000
+    outbox_retry_base_ms: int = 30_000
+    outbox_retry_max_ms: int = 3_600_000
+
+    # metrics.py
+    metrics_enabled: bool = True
+
+    # profiler.py (лише для dev/staging)
+    sql_profiler_enabled: bool = False
+    sql_profiler_budget: int = 10
+    sql_profiler_repeat_threshold: int = 3
+    sql_slow_query_ms: float = 100
+    sql_profiler_history: int = 100
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()
+        return cls(
+            env=os.getenv("ENV", cls.env),
+            secret_key=os.getenv("SECRET_KEY"),
+            redis_url=os.getenv("REDIS_URL", cls.redis_url),
+            database_url=os.getenv("DATABASE_URL"),
+            test_database_url=os.getenv("TEST_DATABASE_URL"),
+            db_echo=os.getenv("DB_ECHO", cls.db_echo).lower(),
+            db_pool_size=_int("DB_POOL_SIZE", cls.db_pool_size),
+            db_max_overflow=_int("DB_MAX_OVERFLOW", cls.db_max_overflow),
+            db_pool_timeout=_float("DB_POOL_TIMEOUT", cls.db_pool_timeout),
+            db_pool_recycle=_int("DB_POOL_RECYCLE", cls.db_pool_recycle),
+            db_pool_pre_ping=_bool("DB_POOL_PRE_PING", cls.db_pool_pre_ping),
+            db_statement_cache_size=_int("DB_STATEMENT_CACHE_SIZE", cls.db_statement_cache_size),
+            hash_pool_workers=_int("HASH_POOL_WORKERS", cls.hash_pool_workers),
+            hash_pool_max_queue=_int("HASH_POOL_MAX_QUEUE", cls.hash_pool_max_queue),
+            local_user_cache_size=_int("LOCAL_USER_CACHE_SIZE", cls.local_user_cache_size),
+            local_user_cache_ttl=_float("LOCAL_USER_CACHE_TTL", cls.local_user_cache_ttl),
+            user_cache_ttl=_int("USER_CACHE_TTL", cls.user_cache_ttl),
+            contact_cache_enabled=_bool("CONTACT_CACHE_ENABLED", cls.contact_cache_enabled),
+            contact_cache_ttl=_int("CONTACT_CACHE_TTL", cls.contact_cache_ttl),
+            contact_cache_max_bytes=_int("CONTACT_CACHE_MAX_BYTES", cls.contact_cache_max_bytes),
+            token_cache_size=_int("TOKEN_CACHE_SIZE", cls.token_cache_size),
+            search_max_candidates=_int("SEARCH_MAX_CANDIDATES", cls.search_max_candidates),
+            import_batch_size=_int("IMPORT_BATCH_SIZE", cls.import_batch_size),
+            import_max_line_bytes=_int("IMPORT_MAX_LINE_BYTES", cls.import_max_line_bytes),
+            export_chunk_size=_int("EXPORT_CHUNK_SIZE", cls.export_chunk_size),
+            batch_max_operations=_int("BATCH_MAX_OPERATIONS", cls.batch_max_operations),
+            rate_limit_enabled=_bool("RATE_LIMIT_ENABLED", cls.rate_limit_enabled),
+            rate_limits=_mapping("RATE_LIMITS"),
+            rate_limit_lease_size=_int("RATE_LIMIT_LEASE_SIZE", cls.rate_limit_lease_size),
+            rate_limit_lease_ttl=_float("RATE_LIMIT_LEASE_TTL", cls.rate_limit_lease_ttl),
+            rate_limit_trust_forwarded=_bool("RATE_LIMIT_TRUST_FORWARDED", cls.rate_limit_trust_forwarded),
+            login_failure_window=_int("LOGIN_FAILURE_WINDOW", cls.login_failure_window),
+            login_account_free_attempts=_int("LOGIN_ACCOUNT_FREE_ATTEMPTS", cls.login_account_free_attempts),
+            login_ip_free_attempts=_int("LOGIN_IP_FREE_ATTEMPTS", cls.login_ip_free_attempts),
+            login_lockout_base=_float("LOGIN_LOCKOUT_BASE", cls.login_lockout_base),
+            login_lockout_max=_int("LOGIN_LOCKOUT_MAX", cls.login_lockout_max),
+            login_bad_pair_ttl=_int("LOGIN_BAD_PAIR_TTL", cls.login_bad_pair_ttl),
+            avatar_max_bytes=_int("AVATAR_MAX_BYTES", cls.avatar_max_bytes),
+            avatar_job_ttl=_int("AVATAR_JOB_TTL", cls.avatar_job_ttl),
+            avatar_storage=os.getenv("AVATAR_STORAGE", cls.avatar_storage).lower(),
+            avatar_local_root=os.getenv("AVATAR_LOCAL_ROOT", cls.avatar_local_root),
+            avatar_local_url=os.getenv("AVATAR_LOCAL_URL", cls.avatar_local_url),
+            avatar_sizes=_ints("AVATAR_SIZES", cls.avatar_sizes),
+            cloudinary_name=os.getenv("CLOUDINARY_NAME"),
+            cloudinary_api_key=os.getenv("CLOUDINARY_API_KEY"),
+            cloudinary_api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+            smtp_user=os.getenv("SMTP_USER"),
+            smtp_password=os.getenv("SMTP_PASSWORD"),
+            smtp_host=os.getenv("SMTP_HOST", cls.smtp_host),
+            smtp_port=_int("SMTP_PORT", cls.smtp_port),
+            smtp_starttls=_bool("SMTP_STARTTLS", cls.smtp_starttls),
+            smtp_pool_size=_int("SMTP_POOL_SIZE", cls.smtp_pool_size),
+            smtp_batch_size=_int("SMTP_BATCH_SIZE", cls.smtp_batch_size),
+            smtp_max_retries=_int("SMTP_MAX_RETRIES", cls.smtp_max_retries),
+            smtp_retry_backoff=_float("SMTP_RETRY_BACKOFF", cls.smtp_retry_backoff),
+            smtp_timeout=_float("SMTP_TIMEOUT", cls.smtp_timeout),
+            outbox_concurrency=_int("OUTBOX_CONCURRENCY", cls.outbox_concurrency),
+            outbox_max_attempts=_int("OUTBOX_MAX_ATTEMPTS", cls.outbox_max_attempts),
+            outbox_claim_idle_ms=_int("OUTBOX_CLAIM_IDLE_MS", cls.outbox_claim_idle_ms),
+            outbox_block_ms=_int("OUTBOX_BLOCK_MS", cls.outbox_block_ms),
+            outbox_retry_base_ms=_int("OUTBOX_RETRY_BASE_MS", cls.outbox_retry_base_ms),
+            outbox_retry_max_ms=_int("OUTBOX_RETRY_MAX_MS", cls.outbox_retry_max_ms),
+            metrics_enabled=_bool("METRICS_ENABLED", cls.metrics_enabled),
+            sql_profiler_enabled=_bool("SQL_PROFILER_ENABLED", cls.sql_profiler_enabled),
+            sql_profiler_budget=_int("SQL_PROFILER_BUDGET", cls.sql_profiler_budget),
+            sql_profiler_repeat_threshold=_int("SQL_PROFILER_REPEAT_THRESHOLD", cls.sql_profiler_repeat_threshold),
+            sql_slow_query_ms=_float("SQL_SLOW_QUERY_MS", cls.sql_slow_query_ms),
+            sql_profiler_history=_int("SQL_PROFILER_HISTORY", cls.sql_profiler_history),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings.from_env()
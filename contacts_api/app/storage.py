@@ -0,0 +1,147 @@
+"""
+Сховище аватарів з адресацією за вмістом.
+
+Ключ об'єкта — sha256 байтів, тож однакові файли зберігаються один раз. Індекс
+sha256 -> URL лежить у Redis: повторне завантаження того самого зображення не
+звертається до сховища взагалі. Бекенд обирається AVATAR_STORAGE:
+"cloudinary" (зменшені копії будує сам Cloudinary через eager-трансформації)
+або "local" (файли на диску, зменшені WebP-копії будує Pillow).
+"""
+import asyncio
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import IO, Iterable, Optional
+
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+from PIL import Image
+
+from contacts_api.app.cache import get_redis
+from contacts_api.app.cloudinary_utils import _configure
+from contacts_api.app.metrics import STORAGE_LATENCY
+from contacts_api.app.settings import get_settings
+
+settings = get_settings()
+
+AVATAR_STORAGE = settings.avatar_storage
+AVATAR_LOCAL_ROOT = settings.avatar_local_root
+AVATAR_LOCAL_URL = settings.avatar_local_url
+# квадратні копії, які віддаються клієнтам; avatar_url вказує на найбільшу
+AVATAR_SIZES = settings.avatar_sizes
+
+EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp"}
+
+_stats = {"dedup_hits": 0, "uploads": 0}
+
+
+class StorageBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def put(self, key: str, file: IO[bytes], content_type: str) -> str:
+        """
+        Зберегти об'єкт під ключем key і повернути URL копії розміру max(AVATAR_SIZES).
+        Викликається в потоці, тож може блокувати.
+        """
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+
+    def __init__(self, sizes: Iterable[int] = AVATAR_SIZES):
+        self.sizes = tuple(sorted(sizes))
+
+    def put(self, key: str, file: IO[bytes], content_type: str) -> str:
+        _configure()
+        public_id = f"avatars/{key}"
+        cloudinary.uploader.upload(
+            file,
+            public_id=public_id,
+            # той самий ключ — ті самі байти, перезаписувати нічого
+            overwrite=False,
+            eager=[{"width": size, "height": size, "crop": "fill"} for size in self.sizes],
+            eager_async=True,
+        )
+        url, _ = cloudinary.utils.cloudinary_url(
+            public_id, width=self.sizes[-1], height=self.sizes[-1], crop="fill", secure=True
+        )
+        return url
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: str = AVATAR_LOCAL_ROOT, base_url: str = AVATAR_LOCAL_URL,
+                 sizes: Iterable[int] = AVATAR_SIZES):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        self.sizes = tuple(sorted(sizes))
+
+    def _path(self, key: str, suffix: str) -> str:
+        # два рівні каталогів, щоб не складати все в одну теку
+        return f"avatars/{key[:2]}/{key}{suffix}"
+
+    def put(self, key: str, file: IO[bytes], content_type: str) -> str:
+        ext = EXTENSIONS.get(content_type, "bin")
+        original = self._path(key, f".{ext}")
+        target = os.path.join(self.root, original)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not os.path.exists(target):
+            tmp = f"{target}.part"
+            with open(tmp, "wb") as out:
+                shutil.copyfileobj(file, out)
+            os.replace(tmp, target)
+
+        for size in self.sizes:
+            variant = os.path.join(self.root, self._path(key, f"_{size}.webp"))
+            if not os.path.exists(variant):
+                with Image.open(target) as image:
+                    if image.mode not in ("RGB", "RGBA"):
+                        image = image.convert("RGBA")
+                    image.thumbnail((size, size))
+                    image.save(f"{variant}.part", "WEBP")
+                os.replace(f"{variant}.part", variant)
+        return f"{self.base_url}/{self._path(key, f'_{self.sizes[-1]}.webp')}"
+
+
+BACKENDS = {"cloudinary": CloudinaryStorage, "local": LocalStorage}
+
+_backend = None
+
+
+def get_storage() -> StorageBackend:
+    global _backend
+    if _backend is None:
+        if AVATAR_STORAGE not in BACKENDS:
+            raise RuntimeError(f"Unknown AVATAR_STORAGE: {AVATAR_STORAGE}")
+        _backend = BACKENDS[AVATAR_STORAGE]()
+    return _backend
+
+
+def _index_key(backend: StorageBackend, digest: str) -> str:
+    return f"{settings.env}:blob:{backend.name}:{digest}"
+
+
+def storage_stats() -> dict:
+    return dict(_stats)
+
+
+async def store_blob(digest: str, file: IO[bytes], content_type: str,
+                     backend: Optional[StorageBackend] = None) -> str:
+    """
+    Повернути URL об'єкта з таким sha256; вивантажити його, лише якщо сховище його ще не бачило.
+    """
+    backend = backend or get_storage()
+    key = _index_key(backend, digest)
+    url = await get_redis().get(key)
+    if url:
+        _stats["dedup_hits"] += 1
+        return url
+
+    with STORAGE_LATENCY.time(backend.name):
+        url = await asyncio.to_thread(backend.put, digest, file, content_type)
+    _stats["uploads"] += 1
+    await get_redis().set(key, url)
+    return url
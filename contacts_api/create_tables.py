@@ -1,12 +1,14 @@
 import asyncio
-from contacts_api.app.database import engine
+from contacts_api.app.database import get_engine
 from contacts_api.app.models import Base
+from contacts_api.app.search import install_search_indexes
 
 
 async def create_tables():
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(install_search_indexes)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+"""
+Генератор синтетичних даних для навантажувального тестування.
+
+    python -m contacts_api.generate_dataset --users 5000 --contacts 2000000 --skew 1.1
+
+Користувачі отримують однаковий пароль (--password), який хешується bcrypt один раз
+на запуск. Кількість контактів на користувача розподілена за Ципфом (--skew 0 —
+рівномірно): кілька «важких» акаунтів і довгий хвіст. Дні народження рівномірні по
+календарю в межах --min-age..--max-age років, тож 29 лютого трапляється з природною
+частотою; birthday_key обчислюється одразу.
+
+Користувачі вставляються пакетами з RETURNING id, контакти — через COPY (asyncpg)
+або пакетними INSERT для інших драйверів. Email-и містять --run-id, тож повторні
+запуски не конфліктують з уже завантаженими даними.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from contacts_api.app.hashing import Hasher
+from contacts_api.app.models import Contact, User, birthday_key
+
+FIRST_NAMES = [
+    "Olena", "Ivan", "Maria", "Andrii", "Sofiia", "Taras", "Anna", "Petro", "Iryna", "Oleh",
+    "Nataliia", "Dmytro", "Yuliia", "Serhii", "Kateryna", "Mykola", "Oksana", "Volodymyr",
+    "Tetiana", "Bohdan", "James", "Emma", "Liam", "Olivia", "Noah", "Ava", "Lucas", "Mia",
+]
+LAST_NAMES = [
+    "Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko", "Melnyk", "Boyko",
+    "Moroz", "Lysenko", "Rudenko", "Savchenko", "Petrenko", "Marchenko", "Kovalchuk", "Oliinyk",
+    "Smith", "Johnson", "Brown", "Garcia", "Miller", "Davis", "Wilson", "Taylor", "Clark",
+]
+NOTES = ["colleague", "family", "gym", "university", "neighbour", "client", "supplier", "school friend"]
+
+CONTACT_COLUMNS = ["first_name", "last_name", "email", "phone", "birthday", "birthday_key", "additional_info", "user_id"]
+
+
+def contacts_per_user(users: int, contacts: int, skew: float, rng: random.Random) -> List[int]:
+    """
+    Розкласти contacts між users за законом Ципфа з показником skew; сума завжди рівна contacts.
+    """
+    if users <= 0:
+        return []
+    weights = [1 / (rank ** skew) for rank in range(1, users + 1)]
+    total = sum(weights)
+    counts = [int(contacts * w / total) for w in weights]
+    for i in rng.choices(range(users), weights=weights, k=contacts - sum(counts)):
+        counts[i] += 1
+    # «важкі» акаунти — не обов'язково перші створені
+    rng.shuffle(counts)
+    return counts
+
+
+def random_birthday(rng: random.Random, min_age: int, max_age: int, today: date) -> date:
+    latest = today - timedelta(days=365 * min_age)
+    earliest = today - timedelta(days=365 * max_age)
+    return earliest + timedelta(days=rng.randrange((latest - earliest).days + 1))
+
+
+def contact_rows(user_ids: List[int], counts: List[int], rng: random.Random, birthday_ratio: float,
+                 min_age: int, max_age: int, domain: str) -> Iterator[tuple]:
+    """
+    Рядки контактів у порядку CONTACT_COLUMNS.
+    """
+    today = date.today()
+    for user_id, count in zip(user_ids, counts):
+        for n in range(count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            birthday = random_birthday(rng, min_age, max_age, today) if rng.random() < birthday_ratio else None
+            yield (
+                first,
+                last,
+                f"{first}.{last}.{user_id}.{n}@{domain}".lower(),
+                f"+380{rng.randrange(10**8, 10**9)}" if rng.random() < 0.9 else None,
+                birthday,
+                birthday_key(birthday),
+                rng.choice(NOTES) if rng.random() < 0.3 else None,
+                user_id,
+            )
+
+
+def _chunks(rows: Iterator[tuple], size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def insert_users(engine: AsyncEngine, count: int, hashed_password: str, run_id: str,
+                       domain: str, batch_size: int) -> List[int]:
+    ids = []
+    async with engine.begin() as conn:
+        for offset in range(0, count, batch_size):
+            rows = [
+                {
+                    "email": f"user-{run_id}-{i}@{domain}",
+                    "hashed_password": hashed_password,
+                    "is_verified": True,
+                    "role": "user",
+                    "version": 1,
+                }
+                for i in range(offset, min(offset + batch_size, count))
+            ]
+            result = await conn.execute(insert(User).returning(User.id, sort_by_parameter_order=True), rows)
+            ids.extend(result.scalars())
+    return ids
+
+
+async def load_contacts(engine: AsyncEngine, rows: Iterator[tuple], batch_size: int,
+                        progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Завантажити контакти COPY-ем (asyncpg) або пакетними INSERT; повертає кількість рядків.
+    """
+    loaded = 0
+    async with engine.begin() as conn:
+        if engine.dialect.driver == "asyncpg":
+            raw = (await conn.get_raw_connection()).driver_connection
+            for chunk in _chunks(rows, batch_size):
+                await raw.copy_records_to_table(Contact.__tablename__, records=chunk, columns=CONTACT_COLUMNS)
+                loaded += len(chunk)
+                if progress:
+                    progress(loaded)
+        else:
+            for chunk in _chunks(rows, batch_size):
+                await conn.execute(insert(Contact), [dict(zip(CONTACT_COLUMNS, row)) for row in chunk])
+                loaded += len(chunk)
+                if progress:
+                    progress(loaded)
+        if engine.dialect.name == "postgresql":
+            # свіжа статистика, інакше планувальник оцінює таблицю як порожню
+            await conn.exec_driver_sql(f"ANALYZE {Contact.__tablename__}")
+    return loaded
+
+
+async def generate(engine: AsyncEngine, users: int, contacts: int, skew: float = 1.0, password: str = "password123",
+                   birthday_ratio: float = 0.8, min_age: int = 16, max_age: int = 80, domain: str = "example.com",
+                   batch_size: int = 10_000, seed: Optional[int] = None, run_id: Optional[str] = None,
+                   progress: Optional[Callable[[int], None]] = None) -> dict:
+    rng = random.Random(seed)
+    run_id = run_id or uuid.uuid4().hex[:8]
+    # bcrypt — один раз на запуск, а не на кожного користувача
+    hashed_password = Hasher.get_password_hash(password)
+
+    user_ids = await insert_users(engine, users, hashed_password, run_id, domain, batch_size)
+    counts = contacts_per_user(len(user_ids), contacts, skew, rng)
+    rows = contact_rows(user_ids, counts, rng, birthday_ratio, min_age, max_age, domain)
+    loaded = await load_contacts(engine, rows, batch_size, progress)
+    return {
+        "run_id": run_id,
+        "users": len(user_ids),
+        "contacts": loaded,
+        "max_contacts_per_user": max(counts, default=0),
+        "user_emails": f"user-{run_id}-<n>@{domain}",
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--contacts", type=int, default=100_000, help="загальна кількість контактів")
+    parser.add_argument("--skew", type=float, default=1.0, help="показник Ципфа для контактів на користувача; 0 — рівномірно")
+    parser.add_argument("--password", default="password123", help="спільний пароль усіх згенерованих користувачів")
+    parser.add_argument("--birthday-ratio", type=float, default=0.8, help="частка контактів із днем народження")
+    parser.add_argument("--min-age", type=int, default=16)
+    parser.add_argument("--max-age", type=int, default=80)
+    parser.add_argument("--domain", default="example.com")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--run-id", default=None, help="частина email-ів користувачів; за замовчуванням випадкова")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    from contacts_api.app.database import dispose_engines, get_engine
+
+    args = parse_args(argv)
+    started = time.perf_counter()
+
+    def progress(loaded: int):
+        elapsed = time.perf_counter() - started
+        print(f"\r{loaded}/{args.contacts} contacts ({loaded / elapsed:,.0f}/s)", end="", file=sys.stderr)
+
+    try:
+        summary = await generate(
+            get_engine(), args.users, args.contacts, skew=args.skew, password=args.password,
+            birthday_ratio=args.birthday_ratio, min_age=args.min_age, max_age=args.max_age,
+            domain=args.domain, batch_size=args.batch_size, seed=args.seed, run_id=args.run_id,
+            progress=progress,
+        )
+    finally:
+        await dispose_engines()
+    print(file=sys.stderr)
+    print(f"{summary} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+"""
+Оновити схему наявної бази без втрати даних (create_tables видаляє таблиці):
+
+    python -m contacts_api.migrate
+
+Створює відсутні таблиці, додає й заповнює birthday_key, ставить триграмні індекси пошуку.
+Кожен крок ідемпотентний, тож запуск можна повторювати.
+"""
+import asyncio
+
+from contacts_api.app.database import dispose_engines, get_engine
+from contacts_api.app.models import Base, install_birthday_keys
+from contacts_api.app.search import install_search_indexes
+
+
+async def migrate() -> int:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        backfilled = await conn.run_sync(install_birthday_keys)
+        await conn.run_sync(install_search_indexes)
+    return backfilled
+
+
+async def main():
+    try:
+        backfilled = await migrate()
+    finally:
+        await dispose_engines()
+    print(f"birthday_key backfilled for {backfilled} contacts")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
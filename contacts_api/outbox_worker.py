@@ -0,0 +1,20 @@
+import asyncio
+import os
+import socket
+
+from contacts_api.app.cache import close_redis
+from contacts_api.app.mailer import close_mailer
+from contacts_api.app.outbox import OutboxConsumer
+
+
+async def run_worker():
+    consumer = OutboxConsumer(name=f"{socket.gethostname()}-{os.getpid()}")
+    try:
+        await consumer.run()
+    finally:
+        await close_mailer()
+        await close_redis()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
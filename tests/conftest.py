@@ -29,13 +29,21 @@ async def redis_client():
 
 @pytest.fixture(scope="function", autouse=True)
 async def _clean_redis(redis_client):
+    from contacts_api.app import cache
+    from contacts_api.app.limiter_config import rate_limiter
+
     await redis_client.flushdb()
+    cache.clear_local()
+    rate_limiter.clear()
     yield
     await redis_client.flushdb()
+    cache.clear_local()
+    rate_limiter.clear()
 
 # ---- App imports after env ----
 from contacts_api.app.main import app
 from contacts_api.app.database import get_db
+from contacts_api.app.cache import del_cached_user
 from contacts_api.app.models import Base, User
 from contacts_api.app.jwt_utils import create_access_token
 from contacts_api.app import routes_auth
@@ -90,25 +98,23 @@ async def client():
         yield ac
 
 
-@pytest.fixture(scope="function", autouse=True)
-def _mock_email(monkeypatch):
-    monkeypatch.setattr(routes_auth, "send_verification_email", lambda *args, **kwargs: None)
-    monkeypatch.setattr(routes_auth, "send_password_reset_email", lambda *args, **kwargs: None)
-
-
 @pytest.fixture
 async def auth_user(client: AsyncClient):
     email = f"test-{uuid.uuid4().hex}@example.com"
     await client.post("/api/auth/signup", json={"email": email, "password": "string123"})
 
     async for db in app.dependency_overrides[get_db]():
-        await db.execute(
+        result = await db.execute(
             update(User)
             .where(User.email == email)
             .values(is_verified=True)
+            .returning(User.id)
             .execution_options(synchronize_session="fetch")
         )
+        user_id = result.scalar_one()
         await db.commit()
+        # Core UPDATE минає write_through_user — кеш користувача скидаємо самі
+        await del_cached_user(user_id)
         db.expire_all()
 
     res = await client.post("/api/auth/login", json={"email": email, "password": "string123"})
@@ -120,13 +126,17 @@ async def get_token(client: AsyncClient):
     await client.post("/api/auth/signup", json={"email": email, "password": "string123"})
 
     async for db in app.dependency_overrides[get_db]():
-        await db.execute(
+        result = await db.execute(
             update(User)
             .where(User.email == email)
             .values(is_verified=True)
+            .returning(User.id)
             .execution_options(synchronize_session="fetch")  # <-- ключ
         )
+        user_id = result.scalar_one()
         await db.commit()
+        # Core UPDATE минає write_through_user — кеш користувача скидаємо самі
+        await del_cached_user(user_id)
         db.expire_all()  # <-- щоб точно не лишилось кешу
 
     res = await client.post("/api/auth/login", json={"email": email, "password": "string123"})
@@ -0,0 +1,190 @@
+import hashlib
+import io
+import os
+import random
+
+import cloudinary
+import cloudinary.uploader
+import pytest
+from PIL import Image
+
+from contacts_api.app import avatars, cloudinary_utils, storage
+from contacts_api.app.avatars import sniff_image_type
+from contacts_api.app.models import User
+from contacts_api.app.storage import CloudinaryStorage, LocalStorage
+
+
+
+def _png(width: int, height: int) -> bytes:
+    # шум, щоб файл не стискався до кількох байтів
+    rng = random.Random(width * height)
+    image = Image.frombytes("RGB", (width, height), bytes(rng.randrange(256) for _ in range(width * height * 3)))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+PNG = _png(300, 200)
+PNG_SHA = hashlib.sha256(PNG).hexdigest()
+PNG_URL = f"/media/avatars/{PNG_SHA[:2]}/{PNG_SHA}_256.webp"
+
+
+class RecordingStorage(LocalStorage):
+    def __init__(self, root):
+        super().__init__(root=root, base_url="/media")
+        self.received = []
+
+    def put(self, key, file, content_type):
+        self.received.append(file.read())
+        file.seek(0)
+        return super().put(key, file, content_type)
+
+
+@pytest.fixture
+def uploads(monkeypatch, tmp_path):
+    backend = RecordingStorage(str(tmp_path))
+    monkeypatch.setattr(storage, "_backend", backend)
+    return backend.received
+
+
+def _headers(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def test_avatar_is_streamed_and_uploaded(client, token_admin, user_admin, uploads):
+    res = await client.post(
+        "/api/auth/avatar",
+        headers=_headers(token_admin),
+        files={"file": ("a.png", PNG, "image/png")},
+    )
+    assert res.status_code == 200
+    assert res.json()["avatar_url"] == PNG_URL
+    assert uploads == [PNG]
+
+
+async def test_same_avatar_is_not_uploaded_twice(client, token_admin, uploads):
+    for _ in range(2):
+        res = await client.post(
+            "/api/auth/avatar",
+            headers=_headers(token_admin),
+            files={"file": ("a.png", PNG, "image/png")},
+        )
+        assert res.status_code == 200
+    assert uploads == [PNG]
+    assert storage.storage_stats()["dedup_hits"] >= 1
+
+
+async def test_avatar_rejects_non_image(client, token_admin, uploads):
+    res = await client.post(
+        "/api/auth/avatar",
+        headers=_headers(token_admin),
+        files={"file": ("a.png", b"<html>not an image</html>", "image/png")},
+    )
+    assert res.status_code == 415
+    assert uploads == []
+
+
+async def test_avatar_rejects_undecodable_image(client, token_admin, uploads):
+    # правильна сигнатура PNG, але далі сміття
+    res = await client.post(
+        "/api/auth/avatar",
+        headers=_headers(token_admin),
+        files={"file": ("a.png", b"\x89PNG\r\n\x1a\n" + b"\x00" * 2000, "image/png")},
+    )
+    assert res.status_code == 415
+    assert uploads == []
+
+
+async def test_avatar_rejects_oversized_file(client, token_admin, uploads, monkeypatch):
+    monkeypatch.setattr(avatars, "AVATAR_MAX_BYTES", len(PNG) - 1)
+    res = await client.post(
+        "/api/auth/avatar",
+        headers=_headers(token_admin),
+        files={"file": ("a.png", PNG, "image/png")},
+    )
+    assert res.status_code == 413
+    assert uploads == []
+
+
+async def test_avatar_requires_file_field(client, token_admin):
+    res = await client.post("/api/auth/avatar", headers=_headers(token_admin), files={"other": ("a.png", PNG)})
+    assert res.status_code == 422
+
+    res = await client.post("/api/auth/avatar", headers=_headers(token_admin), content=PNG)
+    assert res.status_code == 422
+
+
+async def test_avatar_background_job(client, token_admin, user_admin, uploads, SessionLocal, monkeypatch):
+    # задача відкриває власну сесію — у тестах через тестову фабрику
+    monkeypatch.setattr(avatars, "get_sessionmaker", lambda: SessionLocal)
+    res = await client.post(
+        "/api/auth/avatar?background=true",
+        headers=_headers(token_admin),
+        files={"file": ("a.png", PNG, "image/png")},
+    )
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+
+    # ASGITransport чекає, доки відпрацюють фонові задачі
+    job = (await client.get(f"/api/auth/avatar/jobs/{job_id}", headers=_headers(token_admin))).json()
+    assert job["status"] == "done"
+    assert job["avatar_url"] == PNG_URL
+    assert uploads == [PNG]
+    async with SessionLocal() as db:
+        assert (await db.get(User, user_admin.id)).avatar_url == PNG_URL
+
+
+async def test_avatar_job_of_other_user_is_hidden(client, token_user):
+    job_id = await avatars.create_job(user_id=999)
+    res = await client.get(f"/api/auth/avatar/jobs/{job_id}", headers=_headers(token_user))
+    assert res.status_code == 404
+
+
+def test_sniff_image_type():
+    assert sniff_image_type(b"\xff\xd8\xff\xe0") == "image/jpeg"
+    assert sniff_image_type(b"GIF89a......") == "image/gif"
+    assert sniff_image_type(b"RIFF\x00\x00\x00\x00WEBP") == "image/webp"
+    assert sniff_image_type(b"%PDF-1.7") is None
+
+
+def test_local_storage_is_content_addressed(tmp_path):
+    backend = LocalStorage(root=str(tmp_path), base_url="/media/", sizes=(64, 128, 256))
+    with open(tmp_path / "src", "wb+") as f:
+        f.write(PNG)
+        f.seek(0)
+        url = backend.put(PNG_SHA, f, "image/png")
+    assert url == PNG_URL
+    folder = tmp_path / "avatars" / PNG_SHA[:2]
+    with open(folder / f"{PNG_SHA}.png", "rb") as f:
+        assert f.read() == PNG
+    # зменшені копії вписані в квадрат size x size зі збереженням пропорцій
+    for size, expected in ((64, (64, 43)), (128, (128, 85)), (256, (256, 171))):
+        with Image.open(folder / f"{PNG_SHA}_{size}.webp") as variant:
+            assert variant.format == "WEBP"
+            assert variant.size == expected
+    assert not any(name.endswith(".part") for name in os.listdir(folder))
+
+
+def test_local_storage_converts_palette_images(tmp_path):
+    buffer = io.BytesIO()
+    Image.new("P", (40, 40)).save(buffer, "GIF")
+    digest = hashlib.sha256(buffer.getvalue()).hexdigest()
+    buffer.seek(0)
+    url = LocalStorage(root=str(tmp_path), base_url="/media", sizes=(32,)).put(digest, buffer, "image/gif")
+    assert url.endswith(f"{digest}_32.webp")
+
+
+def test_cloudinary_storage_uploads_once_with_eager_sizes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cloudinary_utils, "_configured", True)
+    monkeypatch.setattr(cloudinary.config(), "cloud_name", "demo")
+    monkeypatch.setattr(
+        cloudinary.uploader, "upload", lambda file, **kwargs: calls.append(kwargs) or {}
+    )
+
+    url = CloudinaryStorage(sizes=(128, 64)).put(PNG_SHA, b"img", "image/png")
+
+    assert calls[0]["public_id"] == f"avatars/{PNG_SHA}"
+    assert calls[0]["overwrite"] is False
+    assert [t["width"] for t in calls[0]["eager"]] == [64, 128]
+    assert "w_128" in url and f"avatars/{PNG_SHA}" in url
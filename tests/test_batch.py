@@ -0,0 +1,63 @@
+async def _create(client, headers, first_name):
+    res = await client.post(
+        "/api/contacts/",
+        headers=headers,
+        json={"first_name": first_name, "last_name": "X", "email": f"{first_name.lower()}@x.com"},
+    )
+    return res.json()["id"]
+
+
+async def test_batch_mixed_operations(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    keep = await _create(client, headers, "Keep")
+    gone = await _create(client, headers, "Gone")
+    # прогріти кеш списку — пакет має його інвалідувати
+    await client.get("/api/contacts/", headers=headers)
+
+    res = await client.post(
+        "/api/contacts/batch",
+        headers=headers,
+        json={"operations": [
+            {"op": "create", "data": {"first_name": "New", "last_name": "Y", "email": "new@y.com", "birthday": "2000-02-29"}},
+            {"op": "update", "id": keep, "data": {"phone": "555", "birthday": "1990-12-31"}},
+            {"op": "delete", "id": gone},
+            {"op": "create", "data": {"first_name": "Bad"}},
+            {"op": "update", "id": keep, "data": {"phone": "1"}},
+            {"op": "delete", "id": 999999},
+            {"op": "update", "data": {"phone": "1"}},
+        ]},
+    )
+    assert res.status_code == 200
+    results = res.json()["results"]
+    assert [r["status"] for r in results] == [201, 200, 204, 422, 409, 404, 422]
+    assert results[0]["contact"]["first_name"] == "New"
+    assert results[1]["contact"]["phone"] == "555"
+    assert results[1]["contact"]["first_name"] == "Keep"
+
+    listed = (await client.get("/api/contacts/", headers=headers)).json()
+    by_name = {c["first_name"]: c for c in listed}
+    assert set(by_name) == {"Keep", "New"}
+    assert by_name["Keep"]["birthday"] == "1990-12-31"
+
+    birthdays = await client.get("/api/contacts/birthdays?days=366", headers=headers)
+    assert {c["first_name"] for c in birthdays.json()} == {"Keep", "New"}
+
+
+async def test_batch_cannot_touch_other_users_contacts(client, get_token, token_user):
+    owner = {"Authorization": f"Bearer {get_token}"}
+    cid = await _create(client, owner, "Mine")
+
+    res = await client.post(
+        "/api/contacts/batch",
+        headers={"Authorization": f"Bearer {token_user}"},
+        json={"operations": [{"op": "update", "id": cid, "data": {"phone": "1"}}, {"op": "delete", "id": cid}]},
+    )
+    assert [r["status"] for r in res.json()["results"]] == [404, 409]
+    assert (await client.get(f"/api/contacts/{cid}", headers=owner)).json()["phone"] is None
+
+
+async def test_batch_rejects_empty_and_unknown_ops(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    assert (await client.post("/api/contacts/batch", headers=headers, json={"operations": []})).status_code == 422
+    res = await client.post("/api/contacts/batch", headers=headers, json={"operations": [{"op": "merge"}]})
+    assert res.status_code == 422
@@ -0,0 +1,64 @@
+import random
+
+from benchmarks.harness import compare, measure, percentile, summarize
+from benchmarks.scenarios import SCENARIOS, seed
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7
+    assert percentile([], 50) == 0
+
+
+def test_summarize_reports_ms_and_rps():
+    result = summarize([0.01, 0.02, 0.03, 0.04], errors=1, wall_seconds=0.5)
+    assert result["requests"] == 4
+    assert result["errors"] == 1
+    assert result["rps"] == 8
+    assert result["p50_ms"] == 20
+    assert result["p99_ms"] == 40
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    baseline = {
+        "asgi:list@0": {"p95_ms": 10.0, "rps": 100.0},
+        "asgi:get@0": {"p95_ms": 10.0, "rps": 100.0},
+        "asgi:fast@0": {"p95_ms": 0.2, "rps": 100.0},
+    }
+    results = {
+        "asgi:list@0": {"p95_ms": 14.0, "rps": 100.0},
+        "asgi:get@0": {"p95_ms": 11.0, "rps": 70.0},
+        # +100%, але в межах шуму
+        "asgi:fast@0": {"p95_ms": 0.4, "rps": 100.0},
+        "asgi:new@0": {"p95_ms": 99.0, "rps": 1.0},
+    }
+    regressions = compare(results, baseline, threshold=0.25, noise_ms=1.0)
+    assert [key for key, _ in regressions] == ["asgi:list@0", "asgi:get@0"]
+
+
+async def test_scenarios_run_against_app(client):
+    rng = random.Random(1)
+    ctx = await seed(client, 3, rng)
+    assert len(ctx.contact_ids) == 3
+
+    for scenario in SCENARIOS:
+        result = await measure(client, scenario.build(ctx, rng), total=2, concurrency=1)
+        assert result["requests"] == 2
+        assert result["errors"] == 0, scenario.name
+
+
+
+async def test_cursor_walk_follows_next_cursor(client, monkeypatch):
+    from benchmarks import scenarios
+
+    monkeypatch.setattr(scenarios, "PAGE_SIZE", 2)
+    rng = random.Random(1)
+    ctx = await seed(client, 5, rng)
+    walk = scenarios.cursor_walk(ctx, rng)
+
+    pages = [await walk(client, i) for i in range(4)]
+    assert [p.request.url.params.get("cursor") is None for p in pages] == [True, False, False, True]
+    assert [c["id"] for p in pages[:3] for c in p.json()] == ctx.contact_ids
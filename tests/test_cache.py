@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+
+from contacts_api.app import cache
+
+
+@pytest.mark.asyncio
+async def test_user_cache_serves_repeat_reads_from_local_tier():
+    await cache.set_cached_user(42, {"id": 42, "email": "c@example.com"})
+    cache.clear_local()
+    before = cache.cache_stats()
+
+    assert (await cache.get_cached_user(42))["email"] == "c@example.com"
+    assert (await cache.get_cached_user(42))["email"] == "c@example.com"
+
+    after = cache.cache_stats()
+    assert after["redis"]["hits"] - before["redis"]["hits"] == 1
+    assert after["local"]["hits"] - before["local"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_user_cache_miss_in_both_tiers():
+    before = cache.cache_stats()
+    assert await cache.get_cached_user(404) is None
+    after = cache.cache_stats()
+    assert after["local"]["misses"] - before["local"]["misses"] == 1
+    assert after["redis"]["misses"] - before["redis"]["misses"] == 1
+
+
+def test_local_cache_is_bounded_lru_with_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    local = cache.LocalTTLCache(maxsize=2, ttl=5)
+
+    local.set("a", 1)
+    local.set("b", 2)
+    local.get("a")
+    local.set("c", 3)
+    assert local.get("b") is None  # найдавніше використаний витіснено
+    assert local.get("a") == 1
+
+    now[0] += 6
+    assert local.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_invalidation_message_evicts_local_copy(redis_client):
+    cache.start_invalidation_listener()
+    try:
+        await asyncio.sleep(0.1)
+        cache._local_users.set(7, {"id": 7})
+        await redis_client.publish(cache.INVALIDATION_CHANNEL, "user:7")
+        for _ in range(50):
+            if cache._local_users.get(7) is None:
+                break
+            await asyncio.sleep(0.02)
+        assert cache._local_users.get(7) is None
+    finally:
+        await cache.stop_invalidation_listener()
+
+
+@pytest.mark.asyncio
+async def test_older_version_does_not_overwrite_newer_entry():
+    assert await cache.set_cached_user(9, {"id": 9, "role": "admin", "ver": 3}) is True
+    assert await cache.set_cached_user(9, {"id": 9, "role": "user", "ver": 2}) is False
+    cache.clear_local()
+    assert (await cache.get_cached_user(9))["role"] == "admin"
+
+
+@pytest.mark.asyncio
+async def test_overlapping_user_updates_both_bump_version(SessionLocal, user_user):
+    from sqlalchemy import update
+
+    from contacts_api.app.models import User
+
+    async with SessionLocal() as first, SessionLocal() as second:
+        a = await first.get(User, user_user.id)
+        b = await second.get(User, user_user.id)
+        a.role = "admin"
+        b.avatar_url = "https://example.com/a.webp"
+        await first.commit()
+        # другий сеанс бачив version=1, але це вже не StaleDataError
+        await second.commit()
+        assert (a.version, b.version) == (2, 3)
+
+        await first.execute(update(User).where(User.id == user_user.id).values(is_verified=False))
+        await first.commit()
+        await first.refresh(a)
+        assert a.version == 4
+
+
+@pytest.mark.asyncio
+async def test_verify_email_is_visible_without_waiting_for_ttl(client):
+    from contacts_api.app.jwt_utils import create_email_token
+
+    email = "wt@example.com"
+    await client.post("/api/auth/signup", json={"email": email, "password": "string123"})
+    login = await client.post("/api/auth/login", json={"email": email, "password": "string123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 403  # кешується як неверифікований
+    await client.get(f"/api/auth/verify-email/{create_email_token(email)}")
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_make_admin_updates_cached_role(client, token_admin, token_user, user_user):
+    user_headers = {"Authorization": f"Bearer {token_user}"}
+    assert (await client.get("/api/auth/me", headers=user_headers)).json()["role"] == "user"
+
+    await client.post(f"/api/auth/make-admin/{user_user.id}", headers={"Authorization": f"Bearer {token_admin}"})
+    cached = await cache.get_cached_user(user_user.id)
+    assert cached["role"] == "admin"
+    assert cached["ver"] == 2
+
+
+@pytest.mark.asyncio
+async def test_contact_reads_are_cached_until_a_write(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    created = await client.post("/api/contacts/", headers=headers, json={
+        "first_name": "Cached", "last_name": "One", "email": "cached@one.com",
+    })
+    cid = created.json()["id"]
+
+    before = cache.cache_stats()["contacts"]
+    first = await client.get("/api/contacts/?limit=1", headers=headers)
+    second = await client.get("/api/contacts/?limit=1", headers=headers)
+    item = await client.get(f"/api/contacts/{cid}", headers=headers)
+    item_again = await client.get(f"/api/contacts/{cid}", headers=headers)
+    after = cache.cache_stats()["contacts"]
+
+    assert second.json() == first.json()
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert item_again.json() == item.json()
+    assert after["hits"] - before["hits"] == 2
+    assert after["misses"] - before["misses"] == 2
+
+    await client.put(f"/api/contacts/{cid}", headers=headers, json={"first_name": "Fresh"})
+    assert (await client.get(f"/api/contacts/{cid}", headers=headers)).json()["first_name"] == "Fresh"
+    assert (await client.get("/api/contacts/?limit=1", headers=headers)).json()[0]["first_name"] == "Fresh"
+
+
+@pytest.mark.asyncio
+async def test_contact_cache_can_be_switched_off(client, get_token, monkeypatch):
+    monkeypatch.setattr(cache, "CONTACT_CACHE_ENABLED", False)
+    headers = {"Authorization": f"Bearer {get_token}"}
+    before = cache.cache_stats()["contacts"]
+    await client.get("/api/contacts/", headers=headers)
+    await client.get("/api/contacts/", headers=headers)
+    assert cache.cache_stats()["contacts"] == before
+
+
+@pytest.mark.asyncio
+async def test_contact_cache_size_limit_counts_bytes(monkeypatch):
+    monkeypatch.setattr(cache, "CONTACT_CACHE_MAX_BYTES", 10)
+    generation, _ = await cache.get_cached_contacts(31, "bytes")
+
+    await cache.set_cached_contacts(31, generation, "bytes", "ї" * 6)  # 6 символів, 12 байтів
+    assert (await cache.get_cached_contacts(31, "bytes"))[1] is None
+
+    await cache.set_cached_contacts(31, generation, "bytes", "ї" * 5)
+    assert (await cache.get_cached_contacts(31, "bytes")) == (generation, "ї" * 5)
+
+
+@pytest.mark.asyncio
+async def test_contact_writes_and_reads_survive_redis_outage(client, get_token, monkeypatch):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    assert (await client.get("/api/contacts/", headers=headers)).status_code == 200  # користувач у локальному кеші
+
+    class Down:
+        def __getattr__(self, name):
+            async def fail(*args, **kwargs):
+                raise ConnectionError("redis is down")
+            return fail
+
+    monkeypatch.setattr(cache, "get_redis", lambda: Down())
+    before = cache.cache_stats()["contacts"]["errors"]
+
+    created = await client.post("/api/contacts/", headers=headers, json={
+        "first_name": "Down", "last_name": "Time", "email": "down@time.com",
+    })
+    assert created.status_code == 201
+    listed = await client.get("/api/contacts/", headers=headers)
+    assert [c["first_name"] for c in listed.json()] == ["Down"]
+    # інвалідація після запису і читання; без покоління запис у кеш не пробується
+    assert cache.cache_stats()["contacts"]["errors"] - before == 2
@@ -2,7 +2,6 @@ import pytest
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy import text
 
-from contacts_api.app import cloudinary_utils
 from contacts_api.app.main import app
 
 
@@ -133,31 +132,6 @@ async def test_contact_not_found_404(client: AsyncClient, get_token):
 
 
 
-def test_upload_avatar_returns_secure_url(monkeypatch):
-    def fake_upload(file, public_id=None, overwrite=None, folder=None, **kwargs):
-        assert file == b"img"
-        assert public_id.startswith("avatars/")
-        assert overwrite is True
-        assert folder == "avatars"
-        return {"secure_url": "https://cdn.example.com/a.webp"}
-
-    monkeypatch.setattr(cloudinary_utils.cloudinary.uploader, "upload", fake_upload)
-
-    url = cloudinary_utils.upload_avatar(b"img", "user-1")
-    assert url == "https://cdn.example.com/a.webp"
-
-
-def test_upload_avatar_returns_none_when_no_url(monkeypatch):
-    monkeypatch.setattr(
-        cloudinary_utils.cloudinary.uploader,
-        "upload",
-        lambda *a, **k: {},  # no secure_url
-    )
-
-    assert cloudinary_utils.upload_avatar(b"img", "user-1") is None
-
-
-
 @pytest.mark.asyncio
 async def test_signup_conflict_409(client):
     email = "dup@example.com"
@@ -329,3 +303,322 @@ async def test_dependency_rejects_nonexistent_user_id(client):
 
 
 
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_cursor_pagination(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    for i in range(3):
+        await client.post("/api/contacts/", headers=headers, json={
+            "first_name": f"P{i}", "last_name": "Page", "email": f"p{i}@page.com",
+        })
+
+    first = await client.get("/api/contacts/?limit=2", headers=headers)
+    assert [c["first_name"] for c in first.json()] == ["P0", "P1"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = await client.get(f"/api/contacts/?limit=2&cursor={cursor}", headers=headers)
+    assert [c["first_name"] for c in second.json()] == ["P2"]
+    assert "X-Next-Cursor" not in second.headers
+
+    bad = await client.get("/api/contacts/?cursor=not-a-cursor", headers=headers)
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_contacts_ranked_with_cursor(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    for first, last in [("Annabel", "Lee"), ("Ann", "Smith"), ("Joanna", "Ann"), ("Bob", "Stone")]:
+        await client.post("/api/contacts/", headers=headers, json={
+            "first_name": first, "last_name": last, "email": f"{first.lower()}@mail.com",
+        })
+
+    first = await client.get("/api/contacts/search/?query=ann&limit=2", headers=headers)
+    assert first.status_code == 200
+    names = [c["first_name"] for c in first.json()]
+    assert names[0] == "Ann"
+    assert len(names) == 2
+
+    cursor = first.headers["X-Next-Cursor"]
+    rest = await client.get(f"/api/contacts/search/?query=ann&limit=2&cursor={cursor}", headers=headers)
+    names += [c["first_name"] for c in rest.json()]
+    assert sorted(names) == ["Ann", "Annabel", "Joanna"]
+
+
+@pytest.mark.asyncio
+async def test_search_cursor_walk_covers_every_match_once(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    names = ["Ann", "Anna", "Annette", "Joanna", "Hannah", "Anne", "Ann", "Annabel"]
+    for n, first in enumerate(names):
+        await client.post("/api/contacts/", headers=headers, json={
+            "first_name": first, "last_name": "Walk", "email": f"walk{n}@mail.com",
+        })
+
+    seen, cursor = [], ""
+    while True:
+        page = await client.get("/api/contacts/search/", headers=headers,
+                                params={"query": "ann", "limit": 3, **({"cursor": cursor} if cursor else {})})
+        seen += [c["id"] for c in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == len(names)
+
+
+@pytest.mark.asyncio
+async def test_in_process_search_ranks_a_bounded_candidate_set(client, get_token, monkeypatch):
+    from contacts_api.app import search
+
+    monkeypatch.setattr(search, "SEARCH_MAX_CANDIDATES", 2)
+    headers = {"Authorization": f"Bearer {get_token}"}
+    for first in ["Annabel", "Joanna", "Ann"]:
+        await client.post("/api/contacts/", headers=headers, json={
+            "first_name": first, "last_name": "Cap", "email": f"{first.lower()}@cap.com",
+        })
+    found = await client.get("/api/contacts/search/?query=ann", headers=headers)
+    # лише два кандидати з найменшими id
+    assert sorted(c["first_name"] for c in found.json()) == ["Annabel", "Joanna"]
+
+
+@pytest.mark.asyncio
+async def test_trigram_search_pages_on_integer_rank():
+    # pg_trgm тут недоступний, тож перевіряємо згенерований SQL
+    from types import SimpleNamespace
+
+    from sqlalchemy.dialects import postgresql
+
+    from contacts_api.app import search
+
+    class CapturingSession:
+        async def execute(self, stmt):
+            self.sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            return SimpleNamespace(all=lambda: [])
+
+    db = CapturingSession()
+    assert await search._search_trigram("ann", 10, db, SimpleNamespace(id=1), (333333, 7), None) == []
+    assert "CAST(round(" in db.sql and "AS INTEGER) < 333333" in db.sql
+    assert search.quantize_rank(1 / 3) == 333333
+
+
+@pytest.mark.asyncio
+async def test_search_escapes_like_wildcards(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    await client.post("/api/contacts/", headers=headers, json={
+        "first_name": "Plain", "last_name": "Name", "email": "plain@name.com",
+    })
+    r = await client.get("/api/contacts/search/?query=%25", headers=headers)
+    assert r.json() == []
+
+
+def test_trigram_similarity_matches_pg_trgm():
+    from contacts_api.app.search import similarity, trigrams
+
+    assert trigrams("Ann") == {"  a", " an", "ann", "nn "}
+    assert similarity("Ann", "ann") == 1.0
+    assert similarity("Ann", "Annabel") > similarity("Ann", "Joanna")
+    assert similarity(None, "ann") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_matches_month_day(client, get_token):
+    from datetime import date, timedelta
+
+    headers = {"Authorization": f"Bearer {get_token}"}
+    soon = date.today() + timedelta(days=2)
+    later = date.today() + timedelta(days=30)
+    for name, day in [("Soon", soon), ("Later", later)]:
+        await client.post("/api/contacts/", headers=headers, json={
+            "first_name": name, "last_name": "B", "email": f"{name.lower()}@b.com",
+            "birthday": day.replace(year=1992).isoformat(),
+        })
+
+    week = await client.get("/api/contacts/birthdays", headers=headers)
+    assert [c["first_name"] for c in week.json()] == ["Soon"]
+
+    month = await client.get("/api/contacts/birthdays?days=40", headers=headers)
+    assert [c["first_name"] for c in month.json()] == ["Soon", "Later"]
+
+
+def test_birthday_ranges_wrap_and_leap_day():
+    from datetime import date
+
+    from contacts_api.app.crud import birthday_ranges
+
+    assert birthday_ranges(date(2025, 6, 1), 7) == [(601, 608)]
+    assert birthday_ranges(date(2025, 12, 28), 7) == [(1228, 1231), (101, 104)]
+    # 29 лютого у невисокосний рік святкується 28-го
+    assert birthday_ranges(date(2025, 2, 21), 7) == [(221, 229)]
+    assert birthday_ranges(date(2024, 2, 21), 7) == [(221, 228)]
+    assert birthday_ranges(date(2025, 3, 1), 7) == [(301, 308)]
+    assert birthday_ranges(date(2025, 1, 1), 365) == [(101, 1231)]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_ndjson_reports_bad_rows(client, get_token, monkeypatch):
+    import json
+
+    from contacts_api.app import bulk_import
+
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_SIZE", 2)
+    headers = {"Authorization": f"Bearer {get_token}", "Content-Type": "application/x-ndjson"}
+    lines = [
+        {"first_name": "A", "last_name": "One", "email": "a@one.com", "birthday": "1990-05-01"},
+        {"first_name": "B", "last_name": "Two", "email": "not-an-email"},
+        {"first_name": "C", "last_name": "Three", "email": "c@three.com"},
+        {"first_name": "D", "last_name": "Four", "email": "d@four.com"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n{broken\n"
+
+    r = await client.post("/api/contacts/import", headers=headers, content=body.encode())
+    assert r.status_code == 200
+    report = [json.loads(line) for line in r.text.splitlines()]
+    assert [item["line"] for item in report[:-1]] == [2, 5]
+    assert report[-1] == {"imported": 3, "failed": 2}
+
+    contacts = await client.get("/api/contacts/?limit=10", headers={"Authorization": f"Bearer {get_token}"})
+    assert [c["first_name"] for c in contacts.json()] == ["A", "C", "D"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_reports_oversized_line_and_continues(client, get_token, monkeypatch):
+    import json
+
+    from contacts_api.app import bulk_import
+
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr(bulk_import, "IMPORT_MAX_LINE_BYTES", 150)
+    headers = {"Authorization": f"Bearer {get_token}", "Content-Type": "application/x-ndjson"}
+    contact = {"first_name": "A", "last_name": "One", "email": "a@one.com"}
+    # менше 150 символів, але понад 150 байтів UTF-8
+    wide = {**contact, "first_name": "W", "additional_info": "ї" * 60}
+    assert len(json.dumps(wide, ensure_ascii=False)) < 150 < len(json.dumps(wide, ensure_ascii=False).encode())
+    body = "\n".join([
+        json.dumps(contact),
+        json.dumps(wide, ensure_ascii=False),
+        json.dumps({**contact, "first_name": "B"}),
+    ]).encode()
+
+    async def chunks():
+        for i in range(0, len(body), 16):
+            yield body[i:i + 16]
+
+    r = await client.post("/api/contacts/import", headers=headers, content=chunks())
+    assert r.status_code == 200
+    report = [json.loads(line) for line in r.text.splitlines()]
+    assert report[0] == {"line": 2, "errors": [{"msg": "Line longer than 150 bytes"}]}
+    assert report[-1] == {"imported": 2, "failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_reports_invalid_utf8_line_and_continues(client, get_token, monkeypatch):
+    import json
+
+    from contacts_api.app import bulk_import
+
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_SIZE", 1)
+    headers = {"Authorization": f"Bearer {get_token}", "Content-Type": "application/x-ndjson"}
+    body = b"\n".join([
+        json.dumps({"first_name": "A", "last_name": "One", "email": "a@one.com"}).encode(),
+        b'{"first_name": "\xff\xfe"}',
+        json.dumps({"first_name": "B", "last_name": "Two", "email": "b@two.com"}).encode(),
+    ])
+
+    r = await client.post("/api/contacts/import", headers=headers, content=body)
+    assert r.status_code == 200
+    report = [json.loads(line) for line in r.text.splitlines()]
+    assert report[0]["line"] == 2
+    assert report[0]["errors"][0]["msg"].startswith("Invalid UTF-8")
+    assert report[-1] == {"imported": 2, "failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_csv_with_quoted_newlines(client, get_token):
+    import json
+
+    headers = {"Authorization": f"Bearer {get_token}", "Content-Type": "text/csv"}
+    body = (
+        "first_name,last_name,email,phone,birthday,additional_info\r\n"
+        'Ann,Lee,ann@lee.com,,1991-02-03,"two\nlines, with ""quotes"""\r\n'
+        "Bob,Ray,bob@ray.com,123,,\r\n"
+    )
+
+    r = await client.post("/api/contacts/import", headers=headers, content=body.encode())
+    assert json.loads(r.text.splitlines()[-1]) == {"imported": 2, "failed": 0}
+
+    found = await client.get("/api/contacts/search/?query=ann", headers={"Authorization": f"Bearer {get_token}"})
+    assert found.json()[0]["additional_info"] == 'two\nlines, with "quotes"'
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_rejects_unknown_content_type(client, get_token):
+    r = await client.post(
+        "/api/contacts/import",
+        headers={"Authorization": f"Bearer {get_token}", "Content-Type": "application/xml"},
+        content=b"<contacts/>",
+    )
+    assert r.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_export_contacts_streams_ndjson_and_csv(client, get_token, monkeypatch):
+    import json
+
+    from contacts_api.app import bulk_export
+
+    monkeypatch.setattr(bulk_export, "EXPORT_CHUNK_SIZE", 2)
+    headers = {"Authorization": f"Bearer {get_token}"}
+    for i in range(3):
+        await client.post("/api/contacts/", headers=headers, json={
+            "first_name": f"E{i}", "last_name": "Export", "email": f"e{i}@export.com", "birthday": "1990-01-0" + str(i + 1),
+        })
+
+    nd = await client.get("/api/contacts/export", headers=headers)
+    assert nd.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in nd.text.splitlines()]
+    assert [row["first_name"] for row in rows] == ["E0", "E1", "E2"]
+    assert rows[0]["birthday"] == "1990-01-01"
+
+    csv_resp = await client.get("/api/contacts/export?format=csv", headers=headers)
+    lines = csv_resp.text.splitlines()
+    assert lines[0] == "id,first_name,last_name,email,phone,birthday,additional_info"
+    assert len(lines) == 4
+
+
+@pytest.mark.parametrize("returning", [True, False])
+async def test_update_and_delete_contact_statements(db_session, user_user, monkeypatch, returning):
+    from datetime import date
+    from sqlalchemy import event
+    from contacts_api.app import crud
+    from contacts_api.app.schemas import ContactCreate, ContactUpdate
+
+    bind = db_session.get_bind()
+    monkeypatch.setattr(bind.dialect, "update_returning", returning)
+    monkeypatch.setattr(bind.dialect, "delete_returning", returning)
+    contact = await crud.create_contact(
+        ContactCreate(first_name="A", last_name="B", email="a@b.com"), db_session, user_user
+    )
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        updated = await crud.update_contact(
+            contact.id, ContactUpdate(birthday=date(1990, 12, 31)), db_session, user_user
+        )
+        update_statements = list(statements)
+        statements.clear()
+        deleted = await crud.delete_contact(contact.id, db_session, user_user)
+        delete_statements = list(statements)
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+
+    assert updated.birthday == date(1990, 12, 31)
+    assert updated.birthday_key == 1231
+    assert deleted.id == contact.id
+    if returning:
+        assert update_statements == ["UPDATE"]
+        assert delete_statements == ["DELETE"]
+    else:
+        assert update_statements[0] == "SELECT" and "UPDATE" in update_statements
+    assert await crud.delete_contact(contact.id, db_session, user_user) is None
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+from contacts_api.app import database
+
+
+@pytest.mark.asyncio
+async def test_make_engine_uses_settings_and_reports_pool_stats(monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 2)
+    monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 1)
+    monkeypatch.setattr(database, "DB_STATEMENT_CACHE_SIZE", 0)
+    engine = database.make_engine(os.environ["TEST_DATABASE_URL"])
+    try:
+        assert engine.echo is False
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+            busy = database.pool_stats(engine)
+        idle = database.pool_stats(engine)
+    finally:
+        await engine.dispose()
+
+    assert busy["checked_out"] == 1
+    assert idle["checked_out"] == 0
+    assert idle["size"] == 2
+    assert idle["wait_count"] >= 1
+    assert idle["timeouts"] == 0
+
+
+def test_echo_setting_values():
+    assert database._echo_setting("debug") == "debug"
+    assert database._echo_setting("true") is True
+    assert database._echo_setting("false") is False
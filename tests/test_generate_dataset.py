@@ -0,0 +1,48 @@
+import random
+from datetime import date
+
+from sqlalchemy import func, select
+
+from contacts_api.app.hashing import Hasher
+from contacts_api.app.models import Contact, User
+from contacts_api.generate_dataset import contact_rows, contacts_per_user, generate, random_birthday
+
+
+def test_contacts_per_user_is_exact_and_skewed():
+    rng = random.Random(1)
+    counts = contacts_per_user(100, 10_000, 1.2, rng)
+    assert sum(counts) == 10_000
+    assert max(counts) > 10 * (10_000 / 100)
+
+    flat = contacts_per_user(100, 10_000, 0, rng)
+    assert sum(flat) == 10_000
+    assert max(flat) - min(flat) <= 1
+
+
+def test_birthdays_cover_leap_day():
+    rng = random.Random(2)
+    today = date(2026, 10, 17)
+    birthdays = [random_birthday(rng, 16, 80, today) for _ in range(50_000)]
+    assert any((b.month, b.day) == (2, 29) for b in birthdays)
+    assert min(birthdays).year >= 1946 and max(birthdays).year <= 2010
+
+    rows = list(contact_rows([7], [200], rng, 1.0, 16, 80, "example.com"))
+    assert all(row[5] == row[4].month * 100 + row[4].day for row in rows)
+
+
+async def test_generate_loads_users_and_contacts(engine, db_session):
+    summary = await generate(engine, users=5, contacts=300, skew=1.0, password="bench-pass", seed=3)
+    assert summary["users"] == 5 and summary["contacts"] == 300
+
+    users = (
+        await db_session.execute(select(User).where(User.email.like(f"user-{summary['run_id']}-%")))
+    ).scalars().all()
+    assert len(users) == 5
+    # один хеш на запуск
+    assert len({u.hashed_password for u in users}) == 1
+    assert Hasher.verify_password("bench-pass", users[0].hashed_password)
+
+    total = (
+        await db_session.execute(select(func.count()).where(Contact.user_id.in_([u.id for u in users])))
+    ).scalar()
+    assert total == 300
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+import pytest
+
+from contacts_api.app import routes_auth
+from contacts_api.app.hashing import HashingPool, HashingPoolSaturated
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_hash_and_verify():
+    pool = HashingPool(workers=1, max_queue=4)
+    hashed = await pool.hash("secret123")
+
+    assert await pool.verify("secret123", hashed) is True
+    assert await pool.verify("wrong", hashed) is False
+    assert pool.stats()["completed"] == 3
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_rejects_when_queue_is_full():
+    pool = HashingPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    busy = asyncio.create_task(pool.run(release.wait))
+    queued = asyncio.create_task(pool.run(release.wait))
+    while pool.stats()["running"] < 1 or pool.queued < 1:
+        await asyncio.sleep(0.01)
+
+    with pytest.raises(HashingPoolSaturated):
+        await pool.run(release.wait)
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(busy, queued)
+    assert pool.queued == 0
+    assert pool.stats()["wait_seconds_max"] > 0
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_signup_returns_503_when_hashing_is_saturated(client, monkeypatch):
+    async def saturated(password):
+        raise HashingPoolSaturated()
+
+    monkeypatch.setattr(routes_auth.hashing_pool, "hash", saturated)
+    r = await client.post("/api/auth/signup", json={"email": "busy@example.com", "password": "string123"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from contacts_api.app.jwt_utils import create_access_token, decode_access_token, token_cache_stats
+
+
+def test_repeat_decode_is_served_from_token_cache():
+    token = create_access_token({"sub": "17"})
+    before = token_cache_stats()
+
+    assert decode_access_token(token)["sub"] == "17"
+    payload = decode_access_token(token)
+    payload["sub"] = "changed"  # копія, кеш не зачеплено
+    assert decode_access_token(token)["sub"] == "17"
+
+    after = token_cache_stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+
+
+def test_expired_token_is_rejected_and_not_cached():
+    token = create_access_token({"sub": "19"}, expires_delta=timedelta(seconds=-1))
+    size = token_cache_stats()["size"]
+    with pytest.raises(HTTPException):
+        decode_access_token(token)
+    assert token_cache_stats()["size"] == size
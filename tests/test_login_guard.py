@@ -0,0 +1,104 @@
+import uuid
+
+import pytest
+
+from contacts_api.app import hashing, limiter_config, login_guard
+
+
+@pytest.fixture(autouse=True)
+def _trust_forwarded(monkeypatch):
+    monkeypatch.setattr(limiter_config, "RATE_LIMIT_TRUST_FORWARDED", True)
+
+
+async def _signup(client):
+    email = f"guard-{uuid.uuid4().hex}@example.com"
+    await client.post("/api/auth/signup", json={"email": email, "password": "string123"})
+    return email
+
+
+async def _login(client, email, password, ip="10.0.0.1"):
+    return await client.post(
+        "/api/auth/login", json={"email": email, "password": password}, headers={"X-Forwarded-For": ip}
+    )
+
+
+async def test_repeated_bad_pair_skips_bcrypt(client, monkeypatch):
+    email = await _signup(client)
+    assert (await _login(client, email, "wrong-pass")).status_code == 401
+
+    calls = []
+    original = hashing.pwd_context.verify
+    monkeypatch.setattr(hashing.pwd_context, "verify", lambda *a: calls.append(a) or original(*a))
+
+    assert (await _login(client, email, "wrong-pass")).status_code == 401
+    assert calls == []
+    assert (await _login(client, email, "string123")).status_code == 200
+    assert len(calls) == 1
+
+
+async def test_free_attempts_do_not_lock(client, monkeypatch):
+    monkeypatch.setattr(login_guard, "LOGIN_ACCOUNT_FREE_ATTEMPTS", 3)
+    email = await _signup(client)
+
+    for i in range(3):
+        assert (await _login(client, email, f"bad-{i}")).status_code == 401
+    # рівно LOGIN_ACCOUNT_FREE_ATTEMPTS невдач — ще без блокування
+    assert (await _login(client, email, "string123")).status_code == 200
+
+
+async def test_account_is_locked_progressively(client, monkeypatch):
+    monkeypatch.setattr(login_guard, "LOGIN_ACCOUNT_FREE_ATTEMPTS", 3)
+    monkeypatch.setattr(login_guard, "LOGIN_LOCKOUT_BASE", 30)
+    email = await _signup(client)
+
+    for i in range(3):
+        assert (await _login(client, email, f"bad-{i}")).status_code == 401
+    # четверта невдача ставить блокування на 30 с
+    assert (await _login(client, email, "bad-3")).status_code == 401
+
+    locked = await _login(client, email, "string123")
+    assert locked.status_code == 429
+    assert 1 <= int(locked.headers["Retry-After"]) <= 30
+
+
+async def test_ip_is_locked_across_accounts(client, monkeypatch):
+    monkeypatch.setattr(login_guard, "LOGIN_IP_FREE_ATTEMPTS", 2)
+    monkeypatch.setattr(login_guard, "LOGIN_LOCKOUT_BASE", 30)
+
+    for i in range(3):
+        assert (await _login(client, f"nobody{i}@example.com", "x", ip="10.9.9.9")).status_code == 401
+    assert (await _login(client, "nobody9@example.com", "x", ip="10.9.9.9")).status_code == 429
+    assert (await _login(client, "nobody9@example.com", "x", ip="10.1.1.1")).status_code == 401
+
+
+async def test_non_string_credentials_are_rejected(client):
+    for payload in ({"email": 42, "password": "x"}, {"email": "a@example.com", "password": ["x"]}):
+        assert (await client.post("/api/auth/login", json=payload)).status_code == 422
+
+
+async def test_success_resets_account_counter(client, redis_client):
+    email = await _signup(client)
+    await _login(client, email, "bad")
+    attempt = login_guard.LoginAttempt(email, "string123", "10.0.0.1")
+    assert await redis_client.get(attempt.keys["account_failures"]) == "1"
+
+    assert (await _login(client, email, "string123")).status_code == 200
+    assert await redis_client.get(attempt.keys["account_failures"]) is None
+
+
+async def test_signup_forgets_bad_pairs(client):
+    email = f"late-{uuid.uuid4().hex}@example.com"
+    # вхід до реєстрації кешує пару як хибну
+    assert (await _login(client, email, "string123")).status_code == 401
+    await client.post("/api/auth/signup", json={"email": email, "password": "string123"})
+    assert (await _login(client, email, "string123")).status_code == 200
+
+
+async def test_forget_account_fails_open(monkeypatch, caplog):
+    class Down:
+        async def delete(self, *keys):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(login_guard, "get_redis", lambda: Down())
+    await login_guard.forget_account("down@example.com")
+    assert "login guard unavailable" in caplog.text
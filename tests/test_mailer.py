@@ -0,0 +1,165 @@
+import asyncio
+import smtplib
+from email.message import EmailMessage
+
+import pytest
+
+from contacts_api.app import mailer as mailer_module
+from contacts_api.app.email_utils import build_verification_message
+from contacts_api.app.mailer import Mailer, is_permanent
+
+
+class StubSMTPServer:
+    """
+    Мінімальний SMTP-сервер на asyncio: приймає листи і складає їх у self.messages.
+    rcpt_replies — коди, якими по черзі відповідати на RCPT TO (далі 250).
+    """
+
+    def __init__(self, rcpt_replies=None):
+        self.messages = []
+        self.connections = 0
+        self.logins = 0
+        self.rcpt_replies = list(rcpt_replies or [])
+        # закривати з'єднання після кожного листа, як сервер з коротким idle timeout
+        self.drop_after_message = False
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 stub ESMTP\r\n")
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                writer.write(b"250-stub\r\n250 AUTH PLAIN\r\n")
+            elif command.startswith("AUTH"):
+                self.logins += 1
+                writer.write(b"235 ok\r\n")
+            elif command.startswith("RCPT"):
+                code = self.rcpt_replies.pop(0) if self.rcpt_replies else 250
+                writer.write(f"{code} rcpt\r\n".encode())
+            elif command == "DATA":
+                writer.write(b"354 go\r\n")
+                await writer.drain()
+                body = await reader.readuntil(b"\r\n.\r\n")
+                self.messages.append(body)
+                writer.write(b"250 queued\r\n")
+                if self.drop_after_message:
+                    await writer.drain()
+                    break
+            elif command == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+
+def _message(to: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "noreply@example.com"
+    msg["To"] = to
+    msg["Subject"] = "hi"
+    msg.set_content("hello")
+    return msg
+
+
+@pytest.fixture
+async def smtp_server():
+    server = StubSMTPServer()
+    await server.start()
+    yield server
+    await server.close()
+
+
+def _mailer(server, **kwargs):
+    options = dict(pool_size=1, batch_size=10, max_retries=2, retry_backoff=0.01, timeout=5)
+    options.update(kwargs)
+    return Mailer("127.0.0.1", server.port, **options)
+
+
+async def test_batch_reuses_one_authenticated_connection(smtp_server):
+    m = _mailer(smtp_server, username="user", password="pass")
+    for i in range(5):
+        m.submit(_message(f"u{i}@example.com"))
+    await m.flush()
+    await m.stop()
+
+    assert len(smtp_server.messages) == 5
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+    assert m.stats["sent"] == 5
+    assert m.stats["batches"] <= 2
+
+
+async def test_temporary_failure_is_retried(smtp_server):
+    smtp_server.rcpt_replies = [451]
+    m = _mailer(smtp_server)
+    await m.send(_message("retry@example.com"))
+    await m.stop()
+
+    assert len(smtp_server.messages) == 1
+    assert m.stats["retried"] == 1
+    assert m.stats["sent"] == 1
+
+
+async def test_permanent_failure_is_not_retried(smtp_server):
+    smtp_server.rcpt_replies = [550]
+    m = _mailer(smtp_server)
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        await m.send(_message("nobody@example.com"))
+    await m.stop()
+
+    assert smtp_server.messages == []
+    assert m.stats["retried"] == 0
+    assert m.stats["failed"] == 1
+
+
+async def test_gives_up_after_max_retries():
+    m = Mailer("127.0.0.1", 1, pool_size=1, max_retries=1, retry_backoff=0.01, timeout=1)
+    with pytest.raises(OSError):
+        await m.send(_message("down@example.com"))
+    await m.stop()
+    assert m.stats["retried"] == 1
+    assert m.stats["failed"] == 1
+
+
+async def test_reconnects_after_server_closed_connection(smtp_server):
+    smtp_server.drop_after_message = True
+    m = _mailer(smtp_server)
+    await m.send(_message("first@example.com"))
+    # сервер закрив з'єднання — наступний лист має піти через нове без повтору
+    await m.send(_message("second@example.com"))
+    await m.stop()
+
+    assert len(smtp_server.messages) == 2
+    assert m.stats["connections"] == 2
+    assert m.stats["retried"] == 0
+
+
+def test_is_permanent():
+    assert is_permanent(smtplib.SMTPResponseException(550, b"no"))
+    assert not is_permanent(smtplib.SMTPResponseException(421, b"later"))
+    assert not is_permanent(smtplib.SMTPServerDisconnected())
+
+
+async def test_verification_email_goes_through_shared_mailer(smtp_server, monkeypatch):
+    monkeypatch.setattr(mailer_module, "_mailer", _mailer(smtp_server))
+
+    await mailer_module.get_mailer().send(build_verification_message("new@example.com", "tok"))
+    await mailer_module.close_mailer()
+
+    assert b"verify-email/tok" in smtp_server.messages[0]
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import event
+
+from contacts_api.app import metrics
+from contacts_api.app.metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+    assert 'latency_seconds_sum{route="/a"} 5.55' in text
+
+
+def test_counter_and_label_escaping():
+    registry = Registry()
+    counter = registry.counter("events", "Events", ("name",))
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+
+    assert counter.value('say "hi"') == 3
+    assert "# TYPE events_total counter" in registry.render()
+    assert 'events_total{name="say \\"hi\\""} 3' in registry.render()
+
+
+def test_collectors_render_gauges_and_counters():
+    registry = Registry()
+    stats = {"size": 5, "pool": "Queue", "ok": True, "timeouts": 2, "wait_seconds_total": 0.5}
+    registry.register_collector(
+        lambda: metrics._stat_families("pool", stats, "Pool", counters=("timeouts", "wait_seconds_total"))
+    )
+
+    text = registry.render()
+    assert "# TYPE pool_size gauge" in text
+    assert "pool_size 5" in text
+    assert "# TYPE pool_timeouts_total counter" in text
+    assert "pool_timeouts_total 2" in text
+    assert "# TYPE pool_wait_seconds_total counter" in text
+    assert "pool_wait_seconds_total 0.5" in text
+    assert "pool_pool" not in text and "pool_ok" not in text
+
+
+@pytest.fixture
+def instrumented(engine):
+    metrics.instrument_engine(engine.sync_engine)
+    yield
+    event.remove(engine.sync_engine, "before_cursor_execute", metrics._before_cursor_execute)
+    event.remove(engine.sync_engine, "after_cursor_execute", metrics._after_cursor_execute)
+
+
+async def test_request_metrics_use_route_template(client, get_token, instrumented):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    before = metrics.HTTP_REQUESTS.value("GET", "/api/contacts/{contact_id}", "404")
+    queries_before = metrics.DB_QUERIES_PER_REQUEST.count("/api/contacts/{contact_id}")
+
+    res = await client.get("/api/contacts/999999", headers=headers)
+    assert res.status_code == 404
+
+    assert metrics.HTTP_REQUESTS.value("GET", "/api/contacts/{contact_id}", "404") == before + 1
+    assert metrics.DB_QUERIES_PER_REQUEST.count("/api/contacts/{contact_id}") == queries_before + 1
+    assert metrics.DB_QUERIES.value() > 0
+
+
+async def test_unmatched_routes_share_one_label(client):
+    before = metrics.HTTP_REQUESTS.value("GET", "<unmatched>", "404")
+    await client.get("/no/such/path/1")
+    await client.get("/no/such/path/2")
+    assert metrics.HTTP_REQUESTS.value("GET", "<unmatched>", "404") == before + 2
+
+
+async def test_metrics_endpoint(client, get_token):
+    await client.get("/api/auth/me", headers={"Authorization": f"Bearer {get_token}"})
+
+    res = await client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = res.text
+    assert 'http_requests_total{method="POST",route="/api/auth/login",status="200"}' in body
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in body
+    assert 'cache_operation_duration_seconds_count{operation="set_user"}' in body
+    assert "# TYPE password_hash_pool_completed_total counter" in body
+    assert "# TYPE password_hash_pool_running gauge" in body
+    assert "# TYPE rate_limiter_redis_total counter" in body
+    assert "# TYPE cache_local_hits_total counter" in body
+    assert "# TYPE cache_local_size gauge" in body
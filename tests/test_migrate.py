@@ -0,0 +1,30 @@
+from datetime import date
+
+from sqlalchemy import inspect, text
+
+from contacts_api.app.models import install_birthday_keys
+
+
+async def test_backfill_makes_existing_contacts_visible_to_birthdays(client, get_token, engine, db_session):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    today = date.today()
+    created = await client.post("/api/contacts/", headers=headers, json={
+        "first_name": "Old", "last_name": "Row", "email": "old@row.com",
+        "birthday": today.replace(year=today.year - 28).isoformat(),
+    })
+    assert created.status_code == 201
+
+    # сесія запитів не має тримати транзакцію, інакше ALTER TABLE чекатиме на блокування
+    await db_session.close()
+    # база до появи birthday_key: колонки (і її індексу) ще немає
+    async with engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE contacts DROP COLUMN birthday_key"))
+
+    async with engine.begin() as conn:
+        assert await conn.run_sync(install_birthday_keys) == 1
+        assert await conn.run_sync(install_birthday_keys) == 0
+        indexes = await conn.run_sync(lambda sync: inspect(sync).get_indexes("contacts"))
+    assert "ix_contacts_user_id_birthday_key" in {index["name"] for index in indexes}
+
+    upcoming = await client.get("/api/contacts/birthdays?days=0", headers=headers)
+    assert [c["first_name"] for c in upcoming.json()] == ["Old"]
@@ -0,0 +1,138 @@
+import smtplib
+
+import pytest
+
+from contacts_api.app import outbox
+from contacts_api.app.outbox import OutboxConsumer, enqueue_email, outbox_stats
+
+
+class RecordingMailer:
+    def __init__(self, errors=None):
+        self.sent = []
+        self.errors = list(errors or [])
+
+    async def send(self, message):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(message)
+
+
+async def _consumer(mailer, **kwargs):
+    consumer = OutboxConsumer("test-worker", mailer=mailer, block_ms=10, **kwargs)
+    await consumer.ensure_group()
+    await consumer.ensure_group()  # повторний виклик не падає на BUSYGROUP
+    return consumer
+
+
+async def test_signup_only_enqueues(client, redis_client):
+    res = await client.post("/api/auth/signup", json={"email": "outbox@example.com", "password": "string123"})
+    assert res.status_code == 201
+
+    entries = await redis_client.xrange(outbox.OUTBOX_STREAM)
+    assert len(entries) == 1
+    assert entries[0][1]["kind"] == "verify"
+    assert entries[0][1]["to"] == "outbox@example.com"
+
+
+async def test_consumer_sends_and_acks(redis_client):
+    mailer = RecordingMailer()
+    consumer = await _consumer(mailer)
+    await enqueue_email("verify", "a@example.com", "t1")
+    await enqueue_email("reset", "b@example.com", "t2")
+
+    assert await consumer.run_once() == 2
+    assert sorted(m["To"] for m in mailer.sent) == ["a@example.com", "b@example.com"]
+    assert await outbox_stats() == {"pending": 0, "delayed": 0, "dead": 0}
+    assert (await redis_client.xpending(outbox.OUTBOX_STREAM, outbox.OUTBOX_GROUP))["pending"] == 0
+
+
+async def test_failed_email_is_retried_after_backoff_then_dead_lettered(redis_client, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(outbox.time, "time", lambda: now[0])
+    mailer = RecordingMailer(errors=[OSError("down"), OSError("down")])
+    consumer = await _consumer(mailer, max_attempts=2, retry_base_ms=30_000)
+    await enqueue_email("verify", "c@example.com", "t")
+
+    await consumer.run_once()
+    assert consumer.stats["retried"] == 1
+    assert await outbox_stats() == {"pending": 0, "delayed": 1, "dead": 0}
+
+    # до настання часу повтору лист не чіпають
+    now[0] += 29
+    assert await consumer.run_once() == 0
+
+    now[0] += 1
+    await consumer.run_once()
+    assert consumer.stats["dead"] == 1
+    dead = await redis_client.xrange(outbox.DEAD_LETTER_STREAM)
+    assert dead[0][1]["to"] == "c@example.com"
+    assert dead[0][1]["attempts"] == "2"
+    assert "down" in dead[0][1]["error"]
+    assert await outbox_stats() == {"pending": 0, "delayed": 0, "dead": 1}
+
+
+async def test_retry_delay_doubles_up_to_the_cap():
+    consumer = OutboxConsumer("test-worker", mailer=RecordingMailer(), retry_base_ms=1000, retry_max_ms=5000)
+    assert [consumer.retry_delay_ms(n) for n in range(1, 5)] == [1000, 2000, 4000, 5000]
+
+
+async def test_retried_identical_emails_are_not_merged(monkeypatch):
+    mailer = RecordingMailer(errors=[OSError("down"), OSError("down")])
+    consumer = await _consumer(mailer, retry_base_ms=0)
+    await enqueue_email("verify", "f@example.com", "t")
+    await enqueue_email("verify", "f@example.com", "t")
+
+    await consumer.run_once()
+    assert (await outbox_stats())["delayed"] == 2
+    assert await consumer.run_once() == 2
+    assert len(mailer.sent) == 2
+
+
+async def test_signup_succeeds_when_outbox_is_down(client, redis_client, monkeypatch):
+    from contacts_api.app import routes_auth
+
+    async def down(*args):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(routes_auth, "enqueue_email", down)
+    res = await client.post("/api/auth/signup", json={"email": "nomail@example.com", "password": "string123"})
+    assert res.status_code == 201
+    monkeypatch.undo()
+
+    res = await client.post("/api/auth/request-verification", params={"email": "nomail@example.com"})
+    assert res.status_code == 200
+    entries = await redis_client.xrange(outbox.OUTBOX_STREAM)
+    assert [(e[1]["kind"], e[1]["to"]) for e in entries] == [("verify", "nomail@example.com")]
+
+
+async def test_request_verification_skips_verified_users(client, redis_client, user_user):
+    res = await client.post("/api/auth/request-verification", params={"email": user_user.email})
+    assert res.status_code == 200
+    assert await redis_client.xlen(outbox.OUTBOX_STREAM) == 0
+
+
+async def test_permanent_failure_goes_straight_to_dead_letters(redis_client):
+    mailer = RecordingMailer(errors=[smtplib.SMTPRecipientsRefused({"d@example.com": (550, b"no")})])
+    consumer = await _consumer(mailer)
+    await enqueue_email("verify", "d@example.com", "t")
+
+    await consumer.run_once()
+    assert consumer.stats == {"sent": 0, "retried": 0, "dead": 1, "claimed": 0}
+
+
+async def test_entries_of_crashed_consumer_are_reclaimed(redis_client):
+    await _consumer(RecordingMailer())
+    await enqueue_email("verify", "e@example.com", "t")
+    # воркер "crashed" прочитав, але не підтвердив
+    await redis_client.xreadgroup(outbox.OUTBOX_GROUP, "crashed", {outbox.OUTBOX_STREAM: ">"})
+
+    mailer = RecordingMailer()
+    consumer = await _consumer(mailer, claim_idle_ms=0)
+    assert await consumer.run_once() == 1
+    assert consumer.stats["claimed"] == 1
+    assert mailer.sent[0]["To"] == "e@example.com"
+
+
+async def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        await enqueue_email("spam", "x@example.com", "t")
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import event, select, text
+
+from contacts_api.app import profiler
+from contacts_api.app.models import User
+
+
+@pytest.fixture
+def sql_profiler(engine, monkeypatch):
+    monkeypatch.setattr(profiler, "SQL_PROFILER_ENABLED", True)
+    profiler.instrument_engine(engine.sync_engine)
+    profiler.clear_reports()
+    yield
+    event.remove(engine.sync_engine, "before_cursor_execute", profiler._before_cursor_execute)
+    event.remove(engine.sync_engine, "after_cursor_execute", profiler._after_cursor_execute)
+    profiler.clear_reports()
+
+
+async def test_headers_and_report(client, get_token, sql_profiler):
+    res = await client.get("/api/contacts/999999", headers={"Authorization": f"Bearer {get_token}"})
+    assert res.status_code == 404
+    assert int(res.headers["x-sql-queries"]) >= 1
+    assert float(res.headers["x-sql-time-ms"]) > 0
+    assert res.headers["x-sql-repeated"] == "0"
+
+    report = (await client.get(f"/debug/sql-profile/{res.headers['x-sql-profile']}")).json()
+    assert report["path"] == "/api/contacts/999999"
+    assert report["status"] == 404
+    assert report["queries"] == len(report["statements"]) >= 1
+    assert any("FROM contacts" in s["statement"] for s in report["statements"])
+
+
+async def test_budget_and_problem_filter(client, sql_profiler, monkeypatch):
+    monkeypatch.setattr(profiler, "SQL_PROFILER_BUDGET", 1)
+    await client.post("/api/auth/signup", json={"email": "budget@example.com", "password": "string123"})
+
+    problems = (await client.get("/debug/sql-profile", params={"problems_only": True})).json()
+    assert problems[0]["path"] == "/api/auth/signup"
+    assert problems[0]["over_budget"] is True
+    assert problems[0]["queries"] > 1
+
+
+async def test_repeated_statements_are_flagged(db_session, sql_profiler, caplog):
+    profile = profiler.RequestProfile("GET", "/n-plus-one")
+    token = profiler.current_profile.set(profile)
+    try:
+        for user_id in (1, 2, 3):
+            await db_session.execute(select(User).where(User.id == user_id))
+    finally:
+        profiler.current_profile.reset(token)
+
+    report = profiler._finish(profile, 200)
+    assert report["repeated"][0]["count"] == 3
+    assert "possible N+1 in GET /n-plus-one" in caplog.text
+
+
+async def test_slow_queries_carry_explain_plan(db_session, sql_profiler, monkeypatch):
+    monkeypatch.setattr(profiler, "SQL_SLOW_QUERY_MS", 0)
+    profile = profiler.RequestProfile("GET", "/slow")
+    token = profiler.current_profile.set(profile)
+    try:
+        await db_session.execute(select(User).where(User.email == "nobody@example.com"))
+    finally:
+        profiler.current_profile.reset(token)
+
+    assert profile.slow[0]["plan"] and "cost=" in profile.slow[0]["plan"]
+
+
+async def test_report_endpoint_hidden_when_disabled(client):
+    assert (await client.get("/debug/sql-profile")).status_code == 404
+
+
+async def test_failing_explain_leaves_transaction_usable(db_session, sql_profiler, monkeypatch):
+    monkeypatch.setattr(profiler, "SQL_SLOW_QUERY_MS", 0)
+    monkeypatch.setitem(profiler.EXPLAIN_PREFIXES, "postgresql", "EXPLAIN (NO_SUCH_OPTION) ")
+    profile = profiler.RequestProfile("GET", "/broken-explain")
+    token = profiler.current_profile.set(profile)
+    try:
+        await db_session.execute(text("SHOW TIME ZONE"))
+        await db_session.execute(select(User).where(User.email == "nobody@example.com"))
+        # транзакція не обірвана: наступні оператори виконуються
+        assert (await db_session.execute(text("SELECT 1"))).scalar() == 1
+    finally:
+        profiler.current_profile.reset(token)
+        await db_session.rollback()
+
+    plans = [entry["plan"] for entry in profile.slow]
+    # SHOW не пояснюється зовсім, невдалий EXPLAIN лише позначається в звіті
+    assert plans[0] is None
+    assert plans[1].startswith("EXPLAIN failed")
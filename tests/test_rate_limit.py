@@ -0,0 +1,81 @@
+import time
+
+import pytest
+from starlette.requests import Request
+
+from contacts_api.app import limiter_config
+from contacts_api.app.limiter_config import SlidingWindowLimiter, parse_rate, rate_limit_identity
+
+
+async def test_me_is_limited_per_user(client, token_user, token_admin):
+    headers = {"Authorization": f"Bearer {token_user}"}
+    for _ in range(5):
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+
+    blocked = await client.get("/api/auth/me", headers=headers)
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) >= 1
+
+    # відмова береться з локального кешу, без Redis
+    redis_calls = limiter_config.rate_limiter.stats["redis"]
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 429
+    assert limiter_config.rate_limiter.stats["redis"] == redis_calls
+
+    # інший користувач з тієї ж IP має власний ліміт
+    other = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token_admin}"})
+    assert other.status_code == 200
+
+
+async def test_large_limits_are_leased_locally(redis_client):
+    limiter = SlidingWindowLimiter(lease_size=10, lease_ttl=5)
+    results = [await limiter.hit("t", "user:1", 1000, 60_000) for _ in range(10)]
+
+    assert all(allowed for allowed, _ in results)
+    assert limiter.stats == {"local": 9, "redis": 1, "denied": 0, "errors": 0}
+    [key] = await redis_client.keys("*rl:*")
+    assert await redis_client.get(key) == "10"
+
+
+async def test_previous_window_is_weighted(redis_client, monkeypatch):
+    limiter = SlidingWindowLimiter(lease_size=1)
+    window = 60_000
+    now_ms = (int(time.time() * 1000) // window) * window + window // 2
+    monkeypatch.setattr(limiter_config.time, "time", lambda: now_ms / 1000)
+    index = now_ms // window
+    await redis_client.set(f"test:rl:{{t:ip:1}}:{window}:{index - 1}", 10)
+
+    # половина з 10 запитів попереднього вікна ще «в ковзному вікні»
+    allowed = [(await limiter.hit("t", "ip:1", 10, window))[0] for _ in range(6)]
+    assert allowed == [True] * 5 + [False]
+
+
+async def test_limiter_fails_open_without_redis(monkeypatch):
+    def broken(name):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(limiter_config, "script", broken)
+    limiter = SlidingWindowLimiter()
+    assert await limiter.hit("t", "ip:1", 1, 1000) == (True, 0)
+    assert limiter.stats["errors"] == 1
+
+
+def _request(headers=None, client=("10.0.0.1", 1234)):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "headers": raw, "client": client})
+
+
+def test_identity_prefers_user_then_ip(token_user, user_user, monkeypatch):
+    assert rate_limit_identity(_request({"Authorization": f"Bearer {token_user}"})) == f"user:{user_user.id}"
+    assert rate_limit_identity(_request({"Authorization": "Bearer junk"})) == "ip:10.0.0.1"
+
+    forwarded = {"X-Forwarded-For": "203.0.113.7, 10.0.0.1"}
+    assert rate_limit_identity(_request(forwarded)) == "ip:10.0.0.1"
+    monkeypatch.setattr(limiter_config, "RATE_LIMIT_TRUST_FORWARDED", True)
+    assert rate_limit_identity(_request(forwarded)) == "ip:203.0.113.7"
+
+
+def test_parse_rate():
+    assert parse_rate("5/minute") == (5, 60_000)
+    assert parse_rate("100/second") == (100, 1000)
+    with pytest.raises(ValueError):
+        parse_rate("5/fortnight")
@@ -0,0 +1,45 @@
+from datetime import date
+
+from pydantic import TypeAdapter
+from typing import List
+
+from contacts_api.app import reads
+from contacts_api.app.schemas import ContactOut
+
+
+def test_contacts_json_matches_contact_out(monkeypatch):
+    rows = [
+        (1, "Олена", "Коваль", "olena@example.com", None, date(1990, 2, 28), "нотатка"),
+        (2, "John", "Doe", "john@example.com", "+380", None, None),
+    ]
+    expected = TypeAdapter(List[ContactOut]).dump_json(
+        [ContactOut.model_validate(reads.ContactRow(*row), from_attributes=True) for row in rows]
+    ).decode()
+
+    assert reads.contacts_json(rows) == expected
+    # той самий результат і без orjson
+    monkeypatch.setattr(reads, "orjson", None)
+    assert reads.contacts_json(rows) == expected
+
+
+def test_contact_row_has_no_instance_dict():
+    row = reads.ContactRow(1, "a", "b", "c", None, None, None)
+    assert not hasattr(row, "__dict__")
+
+
+async def test_list_search_and_birthdays_use_lean_rows(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    await client.post(
+        "/api/contacts/",
+        headers=headers,
+        json={"first_name": "Лариса", "last_name": "Lean", "email": "lean@example.com",
+              "birthday": date.today().isoformat()},
+    )
+
+    for url in ("/api/contacts/", "/api/contacts/search/?query=Lean", "/api/contacts/birthdays?days=0"):
+        res = await client.get(url, headers=headers)
+        assert res.status_code == 200
+        assert res.headers["content-type"] == "application/json"
+        [contact] = res.json()
+        assert contact["first_name"] == "Лариса"
+        assert contact["birthday"] == date.today().isoformat()
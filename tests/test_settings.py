@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from contacts_api.app.settings import Settings
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "17")
+    monkeypatch.setenv("CONTACT_CACHE_ENABLED", "false")
+    monkeypatch.setenv("DB_ECHO", "DEBUG")
+    settings = Settings.from_env()
+
+    assert settings.db_pool_size == 17
+    assert settings.contact_cache_enabled is False
+    assert settings.db_echo == "debug"
+    assert settings.smtp_port == 587
+
+
+def test_importing_app_builds_no_resources():
+    env = {k: v for k, v in os.environ.items() if k not in ("DATABASE_URL", "TEST_DATABASE_URL")}
+    code = (
+        "import contacts_api.app.main\n"
+        "from contacts_api.app import cache, cloudinary_utils, database\n"
+        "assert not database._engines\n"
+        "assert cache._client is None\n"
+        "assert not cloudinary_utils._configured\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr